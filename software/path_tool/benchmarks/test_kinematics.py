@@ -0,0 +1,68 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from path_lib import inverse_kinematics  # noqa: E402
+from path_tool import gen_walk_path  # noqa: E402
+
+FRAME_COUNTS = [1, 28, 560, 10000]
+
+
+@pytest.fixture(scope="module")
+def frames(standby):
+    walk = gen_walk_path(standby, g_steps=28)
+    return np.resize(walk, (max(FRAME_COUNTS),) + np.shape(walk)[1:])
+
+
+def test_inverse_kinematics_frame(benchmark, model, standby):
+    benchmark.group = "inverse_kinematics frame"
+    benchmark(model.inverse_kinematics, standby)
+
+
+def test_inverse_kinematics_frame_dict(benchmark, config, standby):
+    benchmark.group = "inverse_kinematics frame"
+    benchmark(inverse_kinematics, standby, config)
+
+
+def test_inverse_kinematics_frame_loop(benchmark, model, frames):
+    benchmark.group = "inverse_kinematics 28 frames"
+    benchmark(lambda: [model.inverse_kinematics(frame) for frame in frames[:28]])
+
+
+@pytest.mark.parametrize("count", FRAME_COUNTS)
+def test_inverse_kinematics_batched(benchmark, model, frames, count):
+    benchmark.group = "inverse_kinematics batched"
+    benchmark(model.inverse_kinematics, frames[:count])
+
+
+@pytest.mark.parametrize("count", FRAME_COUNTS)
+def test_forward_kinematics_batched(benchmark, model, frames, count):
+    benchmark.group = "forward_kinematics batched"
+    angles = model.inverse_kinematics(frames[:count])
+    benchmark(model.forward_kinematics, angles)
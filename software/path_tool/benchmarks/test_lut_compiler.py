@@ -0,0 +1,68 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import os
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import PATH_TOOL_DIR  # noqa: E402
+from lut_compiler import build, compile_gait, render_header  # noqa: E402
+from lut_encoding import ENCODINGS  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def luts(model, spec):
+    return {gait["name"]: compile_gait(model, spec, gait) for gait in spec["gaits"]}
+
+
+def test_build_uncached(benchmark, tmp_path):
+    benchmark.group = "build"
+    benchmark(
+        build,
+        os.path.join(PATH_TOOL_DIR, "config.json"),
+        os.path.join(PATH_TOOL_DIR, "gaits.json"),
+        str(tmp_path / "motion.h"),
+        cache_dir=str(tmp_path / "cache"),
+        force=True,
+    )
+
+
+def test_build_cached(benchmark, tmp_path):
+    benchmark.group = "build"
+    args = (
+        os.path.join(PATH_TOOL_DIR, "config.json"),
+        os.path.join(PATH_TOOL_DIR, "gaits.json"),
+        str(tmp_path / "motion.h"),
+    )
+    build(*args, cache_dir=str(tmp_path / "cache"))
+    benchmark(build, *args, cache_dir=str(tmp_path / "cache"))
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_render_header(benchmark, luts, encoding):
+    benchmark.group = "render_header"
+    benchmark(render_header, luts, encoding)
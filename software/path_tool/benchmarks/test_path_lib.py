@@ -0,0 +1,43 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import STEP_COUNTS  # noqa: E402
+from path_lib import semicircle_generator, semicircle2_generator  # noqa: E402
+
+
+@pytest.mark.parametrize("steps", STEP_COUNTS)
+def test_semicircle_generator(benchmark, steps):
+    benchmark.group = "semicircle"
+    benchmark(semicircle_generator, 30, steps)
+
+
+@pytest.mark.parametrize("steps", STEP_COUNTS)
+def test_semicircle2_generator(benchmark, steps):
+    benchmark.group = "semicircle2"
+    benchmark(semicircle2_generator, steps, 50, 40, 15)
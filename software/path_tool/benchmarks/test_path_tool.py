@@ -0,0 +1,62 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import STEP_COUNTS  # noqa: E402
+from path_tool import gen_walk_path, gen_fastwalk_path, gen_turn_path  # noqa: E402
+from path_tool import gen_climb_path, gen_standup_path  # noqa: E402
+from path_tool import (  # noqa: E402
+    gen_rotatex_path,
+    gen_rotatey_path,
+    gen_rotatez_path,
+    gen_twist_path,
+)
+
+GENERATORS = {
+    "walk": gen_walk_path,
+    "fastwalk": gen_fastwalk_path,
+    "turn": gen_turn_path,
+    "climb": gen_climb_path,
+    "rotatex": gen_rotatex_path,
+    "rotatey": gen_rotatey_path,
+    "rotatez": gen_rotatez_path,
+    "twist": gen_twist_path,
+}
+
+
+@pytest.mark.parametrize("steps", STEP_COUNTS)
+@pytest.mark.parametrize("name", list(GENERATORS))
+def test_gen_path(benchmark, standby, name, steps):
+    benchmark.group = "gen_" + name + "_path"
+    benchmark(GENERATORS[name], standby, g_steps=steps)
+
+
+@pytest.mark.parametrize("steps", STEP_COUNTS)
+def test_gen_standup_path(benchmark, standby, laydown, steps):
+    benchmark.group = "gen_standup_path"
+    benchmark(gen_standup_path, standby, laydown, steps=steps)
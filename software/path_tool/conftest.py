@@ -0,0 +1,65 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import os
+import sys
+
+import pytest
+
+PATH_TOOL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# the path tool modules are imported as top-level modules
+sys.path.insert(0, PATH_TOOL_DIR)
+
+from hexapod_model import HexapodModel  # noqa: E402
+from lut_compiler import load_json  # noqa: E402
+
+# path lengths of the generator benchmarks
+STEP_COUNTS = [20, 28, 100, 400]
+
+
+@pytest.fixture(scope="session")
+def config():
+    return load_json(os.path.join(PATH_TOOL_DIR, "config.json"))
+
+
+@pytest.fixture(scope="session")
+def spec():
+    return load_json(os.path.join(PATH_TOOL_DIR, "gaits.json"))
+
+
+@pytest.fixture(scope="session")
+def model(config):
+    return HexapodModel(config)
+
+
+@pytest.fixture(scope="session")
+def standby(model, spec):
+    return model.gen_posture(*spec["standbyPosture"])
+
+
+@pytest.fixture(scope="session")
+def laydown(model, spec):
+    return model.gen_posture(*spec["laydownPosture"])
@@ -0,0 +1,183 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import hashlib
+import json
+from collections import OrderedDict
+
+import numpy as np
+
+from path_tool import gen_walk_path
+
+
+def config_hash(config, standby_coordinate):
+    """Computes the content hash of a configuration and standby posture.
+
+    Args:
+        config (dict): The hexapod's configuration parameters (`config.json`).
+        standby_coordinate (numpy.ndarray): The standby coordinate of the hexapod.
+
+    Returns:
+        str: The hexadecimal SHA-1 digest.
+    """
+    content = {
+        "config": config,
+        "standby": np.round(np.asarray(standby_coordinate, dtype=float), 9).tolist(),
+    }
+    return hashlib.sha1(
+        json.dumps(content, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+class WalkGaitCache:
+    """LRU cache of solved walking gaits at arbitrary headings.
+
+    The LUTs in `motion.h` only cover the walk directions in 45 deg steps.
+    This cache produces the joint angle table of a walking gait for any
+    heading, quantized to `resolution` deg, so e.g. a joystick heading maps
+    to a ready-made table instead of snapping to the closest 45 deg sector.
+
+    Tables are keyed by (direction, radius, steps, config hash), so models
+    with different configurations or standby postures may share a cache.
+
+    Args:
+        model (HexapodModel): The compiled hexapod model.
+        standby_coordinate (numpy.ndarray): The standby coordinate of the hexapod.
+        maxsize (int, optional): The maximum number of cached tables.
+            Defaults to 720.
+        resolution (float, optional): The direction quantization in deg.
+            Defaults to 1.
+    """
+
+    def __init__(self, model, standby_coordinate, maxsize=720, resolution=1):
+        self.model = model
+        self.standby_coordinate = np.asarray(standby_coordinate, dtype=float)
+        self.maxsize = maxsize
+        self.resolution = resolution
+
+        self.config_hash = config_hash(model.config, self.standby_coordinate)
+
+        self._tables = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._tables)
+
+    def quantize(self, direction):
+        """Snaps a heading to the cache resolution.
+
+        Args:
+            direction (float): The heading in deg.
+
+        Returns:
+            float: The quantized heading in [0, 360).
+        """
+        direction = round(direction / self.resolution) * self.resolution
+        return float(direction % 360)
+
+    def key(self, direction, radius=30, steps=28):
+        """Returns the cache key of a walking gait.
+
+        Args:
+            direction (float): The heading in deg.
+            radius (int, optional): The radius of the walking circle. Defaults to 30.
+            steps (int, optional): The number of steps in the path. Defaults to 28.
+
+        Returns:
+            tuple: (direction, radius, steps, config hash).
+        """
+        return (self.quantize(direction), radius, steps, self.config_hash)
+
+    def _store(self, key, angles):
+        angles.setflags(write=False)
+        self._tables[key] = angles
+        self._tables.move_to_end(key)
+        while len(self._tables) > self.maxsize:
+            self._tables.popitem(last=False)
+
+    def get(self, direction, radius=30, steps=28):
+        """Returns the joint angle table of a walking gait.
+
+        Args:
+            direction (float): The heading in deg.
+            radius (int, optional): The radius of the walking circle. Defaults to 30.
+            steps (int, optional): The number of steps in the path. Defaults to 28.
+
+        Returns:
+            numpy.ndarray: The read-only joint angles, with shape (steps, 6, 3).
+        """
+        key = self.key(direction, radius, steps)
+
+        angles = self._tables.get(key)
+        if angles is not None:
+            self.hits += 1
+            self._tables.move_to_end(key)
+            return angles
+
+        self.misses += 1
+        angles = self.model.inverse_kinematics(
+            gen_walk_path(self.standby_coordinate, steps, radius, key[0])
+        )
+        self._store(key, angles)
+        return angles
+
+    def precompute(self, directions=None, radius=30, steps=28):
+        """Solves the walking gaits of many headings in one IK pass.
+
+        Args:
+            directions (list, optional): The headings in deg. Defaults to None,
+                which means every heading at the cache resolution.
+            radius (int, optional): The radius of the walking circle. Defaults to 30.
+            steps (int, optional): The number of steps in the path. Defaults to 28.
+
+        Returns:
+            int: The number of newly solved tables.
+        """
+        if directions is None:
+            directions = np.arange(0, 360, self.resolution)
+
+        keys = []
+        for direction in directions:
+            key = self.key(direction, radius, steps)
+            if key not in self._tables and key not in keys:
+                keys.append(key)
+
+        # headings beyond maxsize would be evicted right away
+        keys = keys[-self.maxsize :] if self.maxsize > 0 else []
+        if not keys:
+            return 0
+
+        paths = np.stack(
+            [
+                gen_walk_path(self.standby_coordinate, steps, radius, key[0])
+                for key in keys
+            ]
+        )
+        angles = self.model.inverse_kinematics(paths)
+
+        for key, table in zip(keys, angles):
+            self._store(key, table.copy())
+        return len(keys)
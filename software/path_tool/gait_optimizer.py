@@ -0,0 +1,310 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from hexapod_model import HexapodModel, angles_to_ticks, ticks_to_angles
+from lut_validator import DELAY_MS, MAX_VELOCITY, MAX_ACCELERATION, gait_limits
+from path_tool import gen_walk_path, gen_fastwalk_path, gen_climb_path
+
+GENERATORS = {
+    "walk": gen_walk_path,
+    "fastwalk": gen_fastwalk_path,
+    "climb": gen_climb_path,
+}
+
+# default search space of every generator, {parameter: (low, high)}
+PARAM_BOUNDS = {
+    "walk": {"g_radius": (10, 60)},
+    "fastwalk": {"y_radius": (10, 80), "z_radius": (10, 60), "x_radius": (0, 30)},
+    "climb": {
+        "y_radius": (10, 60),
+        "z_radius": (20, 100),
+        "x_radius": (0, 40),
+        "z_shift": (-60, 0),
+    },
+}
+
+OBJECTIVES = ("speed", "travel")
+
+# tolerance of the ground contact detection, in mm
+CONTACT_TOLERANCE = 0.5
+
+
+def evaluate_gaits(
+    model,
+    paths,
+    servo_min,
+    servo_max,
+    delay_ms=DELAY_MS,
+    max_velocity=MAX_VELOCITY,
+    max_acceleration=MAX_ACCELERATION,
+):
+    """Evaluates a population of looping gaits with the same number of steps.
+
+    The paths are solved with one batched IK, rounded to servo ticks, and
+    mapped back with one batched FK, so the measures are the ones of the LUT
+    the firmware would actually play.
+
+    Args:
+        model (HexapodModel): The compiled hexapod model.
+        paths (numpy.ndarray): The gait paths, with shape (gaits, steps, 6, 3).
+        servo_min (int): The ticks at 0 deg.
+        servo_max (int): The ticks at 180 deg.
+        delay_ms (float, optional): The frame period in ms. Defaults to DELAY_MS.
+        max_velocity (float, optional): The joint speed limit in deg/s.
+            Defaults to MAX_VELOCITY.
+        max_acceleration (float, optional): The joint acceleration limit in
+            deg/s^2. Defaults to MAX_ACCELERATION.
+
+    Returns:
+        dict: Arrays with one value per gait:
+            - "feasible": whether all the joints are reachable, within the
+              servo range and within the speed and acceleration limits.
+            - "speed": the body speed in mm/s, from the mean planar (x, y)
+              speed of the legs touching the ground, so it does not depend
+              on the walking direction.
+            - "travel": the total joint travel per body displacement, in deg/mm.
+    """
+    dt = delay_ms / 1000
+
+    with np.errstate(invalid="ignore"):
+        angles = model.inverse_kinematics(paths)
+        feasible = np.all((angles >= 0) & (angles <= 180), axis=(1, 2, 3))
+
+    angles = ticks_to_angles(
+        angles_to_ticks(np.nan_to_num(angles), servo_min, servo_max),
+        servo_min,
+        servo_max,
+    )
+
+    step = np.roll(angles, -1, axis=1) - angles
+    velocity = step / dt
+    acceleration = (velocity - np.roll(velocity, 1, axis=1)) / dt
+    feasible &= np.all(np.abs(velocity) <= max_velocity, axis=(1, 2, 3))
+    feasible &= np.all(np.abs(acceleration) <= max_acceleration, axis=(1, 2, 3))
+
+    tips = model.forward_kinematics(angles)
+    tip_speed = (
+        np.linalg.norm(np.roll(tips[..., :2], -1, axis=1) - tips[..., :2], axis=-1)
+        / dt
+    )
+    contact = tips[..., 2] <= np.min(tips[..., 2], axis=1, keepdims=True) + (
+        CONTACT_TOLERANCE
+    )
+    contact &= np.roll(contact, -1, axis=1)
+    speed = np.sum(tip_speed * contact, axis=(1, 2)) / np.maximum(
+        np.sum(contact, axis=(1, 2)), 1
+    )
+
+    distance = speed * np.shape(paths)[1] * dt
+    travel = np.sum(np.abs(step), axis=(1, 2, 3)) / np.maximum(distance, 1e-9)
+
+    return {"feasible": feasible, "speed": speed, "travel": travel}
+
+
+def _evaluate_chunk(task):
+    """Evaluates a chunk of candidates in a worker process.
+
+    Args:
+        task (tuple): (config, spec, gait, names, candidates, limits), see
+            `optimize_gait`.
+
+    Returns:
+        dict: The measures of `evaluate_gaits` for the chunk.
+    """
+    config, spec, gait, names, candidates, limits = task
+
+    model = HexapodModel(config)
+    standby = model.gen_posture(*spec["standbyPosture"])
+    generator = GENERATORS[gait["generator"]]
+
+    paths = []
+    for candidate in candidates:
+        params = dict(gait.get("params", {}))
+        params.update(zip(names, candidate.tolist()))
+        paths.append(generator(standby, **params))
+
+    return evaluate_gaits(
+        model, np.stack(paths), spec["servoMin"], spec["servoMax"], **limits
+    )
+
+
+def _score(measures, objective, min_speed):
+    """Returns the cost of every candidate, lower is better.
+
+    Args:
+        measures (dict): The measures of `evaluate_gaits`.
+        objective (str): One of `OBJECTIVES`.
+        min_speed (float): The lowest acceptable body speed in mm/s.
+
+    Returns:
+        numpy.ndarray: The costs, inf for the infeasible candidates.
+    """
+    if objective == "speed":
+        cost = -measures["speed"]
+    else:
+        cost = measures["travel"].astype(float)
+
+    valid = measures["feasible"] & (measures["speed"] >= min_speed)
+    return np.where(valid, cost, np.inf)
+
+
+def optimize_gait(
+    config,
+    spec,
+    gait,
+    objective="speed",
+    bounds=None,
+    population=64,
+    generations=10,
+    elite_fraction=0.2,
+    min_speed=10.0,
+    limits=None,
+    max_workers=None,
+    seed=None,
+):
+    """Searches the generator parameters of a gait with the cross-entropy method.
+
+    Every generation samples a population of candidates from a normal
+    distribution per parameter, evaluates them in parallel across the CPU
+    cores, and refits the distribution to the best `elite_fraction`. The
+    first generation is sampled uniformly from `bounds`.
+
+    Args:
+        config (dict): The hexapod's configuration parameters (`config.json`).
+        spec (dict): The gait specification (`gaits.json`).
+        gait (dict): The entry of `spec["gaits"]` to optimize. Its parameters
+            that are not searched, e.g. "g_steps" or "reverse", are kept.
+        objective (str, optional): "speed" to maximize the body speed, or
+            "travel" to minimize the joint travel per distance. Defaults to
+            "speed".
+        bounds (dict, optional): The search space {parameter: (low, high)}.
+            Defaults to None, which uses `PARAM_BOUNDS` of the generator.
+        population (int, optional): The number of candidates per generation.
+            Defaults to 64.
+        generations (int, optional): The number of generations. Defaults to 10.
+        elite_fraction (float, optional): The fraction of the candidates the
+            distribution is refitted to. Defaults to 0.2.
+        min_speed (float, optional): The lowest acceptable body speed in mm/s,
+            which keeps "travel" from shrinking the gait to nothing.
+            Defaults to 10.
+        limits (dict, optional): The "delay_ms", "max_velocity" and
+            "max_acceleration" of `evaluate_gaits`. Defaults to None. The
+            `"limits"` of `gait` take precedence, as in the LUT compiler.
+        max_workers (int, optional): The number of worker processes. Defaults
+            to None, which uses all the CPU cores.
+        seed (int, optional): The seed of the random generator. Defaults to None.
+
+    Returns:
+        tuple: (params, cost), the best generator parameters found, merged into
+        the parameters of `gait`, and their cost. The cost is inf and the
+        parameters are the original ones if no feasible candidate was found.
+
+    Raises:
+        ValueError: If the generator or the objective is not supported.
+    """
+    if gait["generator"] not in GENERATORS:
+        raise ValueError("cannot optimize the generator: " + gait["generator"])
+    if objective not in OBJECTIVES:
+        raise ValueError("unknown objective: " + str(objective))
+
+    if bounds is None:
+        bounds = PARAM_BOUNDS[gait["generator"]]
+    names = list(bounds)
+    low = np.array([bounds[name][0] for name in names], dtype=float)
+    high = np.array([bounds[name][1] for name in names], dtype=float)
+
+    limits = dict(limits or {})
+    limits.update(gait_limits(gait))
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    rng = np.random.default_rng(seed)
+    n_elite = max(int(population * elite_fraction), 1)
+
+    best_params = dict(gait.get("params", {}))
+    best_cost = np.inf
+    mean = None
+    std = None
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for _ in range(generations):
+            if mean is None:
+                candidates = rng.uniform(low, high, (population, len(names)))
+            else:
+                candidates = np.clip(
+                    rng.normal(mean, std, (population, len(names))), low, high
+                )
+            # 1 um / 0.001 deg is plenty, and keeps the output readable
+            candidates = np.round(candidates, 3)
+
+            chunks = np.array_split(candidates, min(max_workers, population))
+            tasks = [
+                (config, spec, gait, names, chunk, limits)
+                for chunk in chunks
+                if len(chunk) > 0
+            ]
+            costs = np.concatenate(
+                [
+                    _score(measures, objective, min_speed)
+                    for measures in executor.map(_evaluate_chunk, tasks)
+                ]
+            )
+
+            order = np.argsort(costs)
+            if costs[order[0]] < best_cost:
+                best_cost = float(costs[order[0]])
+                best_params = dict(gait.get("params", {}))
+                best_params.update(zip(names, candidates[order[0]].tolist()))
+
+            elite = candidates[order[:n_elite]][np.isfinite(costs[order[:n_elite]])]
+            if len(elite) > 0:
+                mean = np.mean(elite, axis=0)
+                # keep exploring a little even once the elite has converged
+                std = np.maximum(np.std(elite, axis=0), (high - low) * 0.01)
+
+    return best_params, best_cost
+
+
+def optimized_spec(spec, results):
+    """Returns a copy of the gait specification with optimized parameters.
+
+    Args:
+        spec (dict): The gait specification (`gaits.json`).
+        results (dict): The optimized parameters keyed by gait name.
+
+    Returns:
+        dict: The specification to feed the LUT compiler.
+    """
+    spec = copy.deepcopy(spec)
+    for gait in spec["gaits"]:
+        if gait["name"] in results:
+            gait["params"] = results[gait["name"]]
+    return spec
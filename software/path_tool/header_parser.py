@@ -0,0 +1,167 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import re
+
+import numpy as np
+
+from hexapod_model import SERVO_MID
+from lut_encoding import decode_lut
+
+# C comments, removed before parsing
+COMMENT_RE = re.compile(r"/\*.*?\*/|//[^\n]*", re.DOTALL)
+
+# `static [const] <type> <name>[d0][d1]... = {...};`
+ARRAY_RE = re.compile(
+    r"static\s+(?:const\s+)?(\w+)\s+(\w+)\s*((?:\[\s*\d+\s*\])+)\s*=\s*\{(.*?)\}\s*;",
+    re.DOTALL,
+)
+
+# `static [const] int <name>_length = <N>;`
+LENGTH_RE = re.compile(r"static\s+(?:const\s+)?int\s+(\w+)_length\s*=\s*(\d+)\s*;")
+
+DIM_RE = re.compile(r"\d+")
+
+NP_TYPES = {
+    "int": np.int32,
+    "uint16_t": np.uint16,
+    "int16_t": np.int16,
+    "int8_t": np.int8,
+    "uint8_t": np.uint8,
+}
+
+# drops the braces, so the initializer becomes a flat comma separated list
+BRACES = str.maketrans("{}", "  ")
+
+
+def parse_arrays(text):
+    """Parses all the static integer arrays of C source.
+
+    Every array is converted with a single regex match and a single
+    `numpy.fromstring` pass over its initializer.
+
+    Args:
+        text (str): The C source.
+
+    Returns:
+        dict: The arrays keyed by variable name, with the shape and the type
+        of their declaration.
+
+    Raises:
+        ValueError: If the number of values of an array does not match its
+            declared shape or its type, or its type is unknown.
+    """
+    text = COMMENT_RE.sub("", text)
+
+    arrays = {}
+    for match in ARRAY_RE.finditer(text):
+        c_type, name, dims, body = match.groups()
+        if c_type not in NP_TYPES:
+            raise ValueError("unsupported type of " + name + ": " + c_type)
+
+        shape = tuple(int(dim) for dim in DIM_RE.findall(dims))
+        # parse as int64 first so out of range values are not silently wrapped
+        values = np.fromstring(body.translate(BRACES), dtype=np.int64, sep=",")
+        info = np.iinfo(NP_TYPES[c_type])
+        if values.size > 0 and (values.min() < info.min or values.max() > info.max):
+            raise ValueError(name + " has values out of the " + c_type + " range")
+        if values.size != np.prod(shape):
+            raise ValueError(
+                name
+                + " has "
+                + str(values.size)
+                + " values, expected "
+                + str(int(np.prod(shape)))
+            )
+        arrays[name] = values.reshape(shape).astype(NP_TYPES[c_type])
+
+    return arrays
+
+
+def parse_motion_header(text, servo_mid=SERVO_MID):
+    """Parses the LUTs of a motion header back into arrays.
+
+    LUTs in the plain layout (`static int lut_X[N][6][3]`) are read as is,
+    LUTs in one of the compact encodings of `lut_encoding` are decoded.
+
+    Args:
+        text (str): The content of the header.
+        servo_mid (int, optional): The tick at 90 deg, used to decode the
+            "shared" encoding. Defaults to SERVO_MID.
+
+    Returns:
+        dict: The servo ticks keyed by LUT name, in header order, each an
+        int16 array with shape (steps, 6, 3).
+
+    Raises:
+        ValueError: If a LUT is malformed, or its `_length` does not match.
+    """
+    arrays = parse_arrays(text)
+    lengths = {
+        match.group(1): int(match.group(2))
+        for match in LENGTH_RE.finditer(COMMENT_RE.sub("", text))
+    }
+
+    luts = {}
+    for name, length in lengths.items():
+        if name in arrays:
+            lut = arrays[name]
+        elif name + "_base" in arrays:
+            encoded = {"base": arrays[name + "_base"]}
+            if name + "_delta" in arrays:
+                encoded["delta"] = arrays[name + "_delta"]
+            lut = decode_lut(encoded, "delta")
+        elif name + "_curves" in arrays:
+            lut = decode_lut(
+                {"curves": arrays[name + "_curves"], "refs": arrays[name + "_refs"]},
+                "shared",
+                servo_mid,
+            )
+        else:
+            raise ValueError("no table found for " + name + "_length")
+
+        if np.shape(lut)[0] != length or np.shape(lut)[1:] != (6, 3):
+            raise ValueError(
+                name + " has shape " + str(np.shape(lut)) + ", expected "
+                + str((length, 6, 3))
+            )
+        luts[name] = np.asarray(lut).astype(np.int16)
+
+    return luts
+
+
+def load_motion_header(filename, servo_mid=SERVO_MID):
+    """Loads the LUTs of a motion header file.
+
+    Args:
+        filename (str): Path to the header, e.g. `motion.h`.
+        servo_mid (int, optional): The tick at 90 deg, used to decode the
+            "shared" encoding. Defaults to SERVO_MID.
+
+    Returns:
+        dict: The servo ticks keyed by LUT name, see `parse_motion_header`.
+    """
+    with open(filename, "r", encoding="utf-8") as read_file:
+        return parse_motion_header(read_file.read(), servo_mid)
@@ -0,0 +1,330 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import json
+
+import numpy as np
+
+SERVO_MIN = 125  # servo ticks at 0 deg, matches SERVOMIN in config.h
+SERVO_MID = 350  # servo ticks at 90 deg, matches SERVOMID in config.h
+SERVO_MAX = 575  # servo ticks at 180 deg, matches SERVOMAX in config.h
+
+
+def angles_to_ticks(angles, servo_min=SERVO_MIN, servo_max=SERVO_MAX):
+    """Converts joint angles to servo PWM ticks.
+
+    Args:
+        angles (numpy.ndarray): The joint angles in degrees, with any shape.
+        servo_min (int, optional): The ticks at 0 deg. Defaults to SERVO_MIN.
+        servo_max (int, optional): The ticks at 180 deg. Defaults to SERVO_MAX.
+
+    Returns:
+        numpy.ndarray: The servo ticks as integers, with the same shape as `angles`.
+    """
+    servo_range = servo_max - servo_min
+    return np.round(np.asarray(angles) / 180 * servo_range + servo_min).astype(int)
+
+
+def ticks_to_angles(ticks, servo_min=SERVO_MIN, servo_max=SERVO_MAX):
+    """Converts servo PWM ticks to joint angles, the inverse of `angles_to_ticks`.
+
+    Args:
+        ticks (numpy.ndarray): The servo ticks, with any shape.
+        servo_min (int, optional): The ticks at 0 deg. Defaults to SERVO_MIN.
+        servo_max (int, optional): The ticks at 180 deg. Defaults to SERVO_MAX.
+
+    Returns:
+        numpy.ndarray: The joint angles in degrees, with the same shape as `ticks`.
+    """
+    servo_range = servo_max - servo_min
+    return (np.asarray(ticks, dtype=float) - servo_min) / servo_range * 180
+
+
+class HexapodModel:
+    """Precompiled kinematic model of the hexapod.
+
+    All the values needed by the kinematics are pulled out of the configuration
+    dictionary once and stored as contiguous arrays, together with the sin/cos
+    of the leg mount angles, so repeated IK/FK calls only do the math.
+
+    Args:
+        config (dict): A dictionary containing the hexapod's configuration parameters.
+            The dictionary should contain the following keys:
+                - "legMountX": A list of x-coordinates for the leg mounts.
+                - "legMountY": A list of y-coordinates for the leg mounts.
+                - "legRootToJoint1": The distance from the leg root to joint 1.
+                - "legJoint1ToJoint2": The distance from joint 1 to joint 2.
+                - "legJoint2ToJoint3": The distance from joint 2 to joint 3.
+                - "legJoint3ToTip": The distance from joint 3 to the leg tip.
+                - "legMountAngle": A list of angles for the leg mounts in degrees.
+                - "legScale": A list of scaling factors for each leg's joint angles.
+    """
+
+    def __init__(self, config):
+        self.config = config
+
+        self.mount_x = np.ascontiguousarray(config["legMountX"], dtype=float)
+        self.mount_y = np.ascontiguousarray(config["legMountY"], dtype=float)
+
+        self.mount_angle = (
+            np.ascontiguousarray(config["legMountAngle"], dtype=float) / 180 * np.pi
+        )
+        self.cos_mount = np.cos(self.mount_angle)
+        self.sin_mount = np.sin(self.mount_angle)
+
+        self.leg_scale = np.ascontiguousarray(config["legScale"], dtype=float)
+        self.joint_scale = np.ascontiguousarray(self.leg_scale[:, 1])
+
+        self.root_j1 = float(config["legRootToJoint1"])
+        self.j1_j2 = float(config["legJoint1ToJoint2"])
+        self.j2_j3 = float(config["legJoint2ToJoint3"])
+        self.j3_tip = float(config["legJoint3ToTip"])
+
+        self._j2_j3_sq = self.j2_j3 * self.j2_j3
+        self._j3_tip_sq = self.j3_tip * self.j3_tip
+
+    @classmethod
+    def from_file(cls, filename="config.json"):
+        """Builds a model from a JSON configuration file.
+
+        Args:
+            filename (str, optional): Path to the configuration file.
+                Defaults to "config.json".
+
+        Returns:
+            HexapodModel: The compiled model.
+        """
+        with open(filename, "r", encoding="utf-8") as read_file:
+            return cls(json.load(read_file))
+
+    def inverse_kinematics(self, dest, legs=None):
+        """Calculates the joint angles for each leg to reach a desired destination.
+
+        Args:
+            dest (numpy.ndarray): An array representing the desired destination
+                coordinates for each leg. The shape of the array is (..., 6, 3), where:
+                    - ... is any number of leading dimensions (e.g. steps).
+                    - 6 is the number of legs.
+                    - 3 is the number of coordinates (x, y, z).
+            legs (list, optional): The indices of the legs the second to last
+                axis of `dest` refers to, to solve a subset of the legs or the
+                same leg several times. Defaults to None, which means all the
+                6 legs in order.
+
+        Returns:
+            numpy.ndarray: An array representing the joint angles for each leg
+            in degrees. The shape of the array is the same as `dest`, where
+            the last axis holds the joint angles (j1, j2, j3).
+        """
+        dest = np.asarray(dest, dtype=float)
+
+        if legs is None:
+            legs = slice(None)
+
+        mount_x = self.mount_x[legs]
+        mount_y = self.mount_y[legs]
+        cos_mount = self.cos_mount[legs]
+        sin_mount = self.sin_mount[legs]
+
+        temp_x = dest[..., 0] - mount_x
+        temp_y = dest[..., 1] - mount_y
+
+        local_x = temp_x * cos_mount + temp_y * sin_mount
+        local_y = temp_x * sin_mount - temp_y * cos_mount
+
+        angles = np.empty(dest.shape)
+        x = local_x - self.root_j1
+        y = local_y
+
+        angles[..., 0] = -(np.arctan2(y, x) * 180 / np.pi) + 90
+
+        x = np.sqrt(x * x + y * y) - self.j1_j2
+        y = dest[..., 2]
+        ar = np.arctan2(y, x)
+        lr2 = x * x + y * y
+        lr = np.sqrt(lr2)
+        a1 = np.arccos(
+            (lr2 + self._j2_j3_sq - self._j3_tip_sq) / (2 * self.j2_j3 * lr)
+        )
+        a2 = np.arccos(
+            (lr2 - self._j2_j3_sq + self._j3_tip_sq) / (2 * self.j3_tip * lr)
+        )
+
+        joint_scale = self.joint_scale[legs]
+        angles[..., 1] = 90 - ((ar + a1) * 180 / np.pi) * joint_scale
+        angles[..., 2] = (90 - ((a1 + a2) * 180 / np.pi)) * joint_scale + 90
+
+        return angles
+
+    def joint_positions(self, angles):
+        """Calculates the positions of all the joints from the joint angles.
+
+        Args:
+            angles (numpy.ndarray): An array representing the joint angles for each
+                leg in degrees. The shape of the array is (..., 6, 3), where:
+                    - ... is any number of leading dimensions (e.g. steps).
+                    - 6 is the number of legs.
+                    - 3 is the number of joint angles (j1, j2, j3).
+
+        Returns:
+            numpy.ndarray: An array representing the joint coordinates in the
+            body frame. The shape of the array is (..., 6, 5, 3), where the
+            third to last axis holds the leg root, joint 1, joint 2, joint 3
+            and the leg tip.
+        """
+        angles = np.asarray(angles, dtype=float)
+
+        # angle of the leg plane, and of the two links inside the leg plane
+        heading = (90 - angles[..., 0]) / 180 * np.pi
+        femur = (90 - angles[..., 1]) * self.joint_scale / 180 * np.pi
+        knee = (90 - (angles[..., 2] - 90) * self.joint_scale) / 180 * np.pi
+        tibia = femur - knee
+
+        cos_heading = np.cos(heading)
+        sin_heading = np.sin(heading)
+
+        # distance of joint 2, joint 3 and the tip from joint 1 along the
+        # leg plane, and their height
+        j3_reach = self.j1_j2 + self.j2_j3 * np.cos(femur)
+        j3_height = self.j2_j3 * np.sin(femur)
+        reach = np.stack(
+            (
+                np.full(heading.shape, self.j1_j2),
+                j3_reach,
+                j3_reach + self.j3_tip * np.cos(tibia),
+            ),
+            axis=-1,
+        )
+        height = np.stack(
+            (
+                np.zeros(heading.shape),
+                j3_height,
+                j3_height + self.j3_tip * np.sin(tibia),
+            ),
+            axis=-1,
+        )
+
+        # leg frame coordinates of the leg root, joint 1 and the rest, (..., 6, 5)
+        local_x = np.concatenate(
+            (
+                np.zeros(heading.shape + (1,)),
+                np.full(heading.shape + (1,), self.root_j1),
+                self.root_j1 + reach * cos_heading[..., np.newaxis],
+            ),
+            axis=-1,
+        )
+        local_y = np.concatenate(
+            (
+                np.zeros(heading.shape + (2,)),
+                reach * sin_heading[..., np.newaxis],
+            ),
+            axis=-1,
+        )
+        local_z = np.concatenate((np.zeros(heading.shape + (2,)), height), axis=-1)
+
+        cos_mount = self.cos_mount[:, np.newaxis]
+        sin_mount = self.sin_mount[:, np.newaxis]
+
+        joints = np.empty(heading.shape + (5, 3))
+        joints[..., 0] = (
+            local_x * cos_mount + local_y * sin_mount + self.mount_x[:, np.newaxis]
+        )
+        joints[..., 1] = (
+            local_x * sin_mount - local_y * cos_mount + self.mount_y[:, np.newaxis]
+        )
+        joints[..., 2] = local_z
+
+        return joints
+
+    def forward_kinematics(self, angles):
+        """Calculates the leg tip positions from the joint angles.
+
+        This is the exact inverse of `inverse_kinematics`. Use `ticks_to_angles`
+        to evaluate servo PWM ticks, e.g. a LUT or a recorded servo stream.
+
+        Args:
+            angles (numpy.ndarray): An array representing the joint angles for each
+                leg in degrees. The shape of the array is (..., 6, 3), where:
+                    - ... is any number of leading dimensions (e.g. steps).
+                    - 6 is the number of legs.
+                    - 3 is the number of joint angles (j1, j2, j3).
+
+        Returns:
+            numpy.ndarray: An array representing the leg tip coordinates in the
+            body frame. The shape of the array is (..., 6, 3).
+        """
+        angles = np.asarray(angles, dtype=float)
+
+        # angle of the leg plane, and of the two links inside the leg plane
+        heading = (90 - angles[..., 0]) / 180 * np.pi
+        femur = (90 - angles[..., 1]) * self.joint_scale / 180 * np.pi
+        knee = (90 - (angles[..., 2] - 90) * self.joint_scale) / 180 * np.pi
+        tibia = femur - knee
+
+        reach = (
+            self.j1_j2 + self.j2_j3 * np.cos(femur) + self.j3_tip * np.cos(tibia)
+        )
+        local_x = self.root_j1 + reach * np.cos(heading)
+        local_y = reach * np.sin(heading)
+
+        tip = np.empty(angles.shape)
+        tip[..., 0] = (
+            local_x * self.cos_mount + local_y * self.sin_mount + self.mount_x
+        )
+        tip[..., 1] = (
+            local_x * self.sin_mount - local_y * self.cos_mount + self.mount_y
+        )
+        tip[..., 2] = self.j2_j3 * np.sin(femur) + self.j3_tip * np.sin(tibia)
+
+        return tip
+
+    def gen_posture(self, j2_angle, j3_angle):
+        """Generates a posture for the hexapod based on joint angles.
+
+        Args:
+            j2_angle (float): The angle of joint 2 in degrees.
+            j3_angle (float): The angle of joint 3 in degrees.
+
+        Returns:
+            numpy.ndarray: A 2D array representing the hexapod's posture.
+            The shape of the array is (6, 3), where:
+                - 6 is the number of legs.
+                - 3 is the number of coordinates (x, y, z).
+        """
+        j2_rad = j2_angle / 180 * np.pi
+        j3_rad = j3_angle / 180 * np.pi
+
+        reach = (
+            self.root_j1
+            + self.j1_j2
+            + (self.j2_j3 * np.sin(j2_rad))
+            + self.j3_tip * np.cos(j3_rad)
+        )
+
+        posture = np.zeros((6, 3))
+        posture[:, 0] = self.mount_x + reach * self.cos_mount
+        posture[:, 1] = self.mount_y + reach * self.sin_mount
+        posture[:, 2] = self.j2_j3 * np.cos(j2_rad) - self.j3_tip * np.sin(j3_rad)
+        return posture
@@ -0,0 +1,197 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import json
+import struct
+
+import numpy as np
+
+# file layout:
+#   - MAGIC
+#   - the byte length of the index, little-endian uint32
+#   - the index, UTF-8 JSON, padded with spaces to ALIGNMENT
+#   - the arrays, C order, each starting at a multiple of ALIGNMENT
+# the offsets in the index are counted from the start of the file
+MAGIC = b"HEXLUT\x00\x01"
+BUNDLE_VERSION = 1
+ALIGNMENT = 64
+
+# the default storage type of the servo ticks
+DEFAULT_DTYPE = "<i2"
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_bundle(filename, luts, meta=None, dtype=DEFAULT_DTYPE):
+    """Writes LUTs to a binary bundle.
+
+    Args:
+        filename (str): Path of the bundle.
+        luts (dict): The arrays keyed by gait name, in output order, e.g. the
+            servo ticks with shape (steps, 6, 3).
+        meta (dict, optional): JSON serializable metadata stored in the index,
+            e.g. the servo range. Defaults to None.
+        dtype (str, optional): The storage type of the arrays. Defaults to
+            DEFAULT_DTYPE, little-endian int16.
+
+    Raises:
+        ValueError: If a value does not fit the storage type.
+    """
+    dtype = np.dtype(dtype)
+
+    arrays = []
+    for name, lut in luts.items():
+        lut = np.asarray(lut)
+        if dtype.kind in "iu" and lut.size > 0:
+            info = np.iinfo(dtype)
+            if lut.min() < info.min or lut.max() > info.max:
+                raise ValueError(name + " does not fit " + dtype.name)
+        arrays.append((name, np.ascontiguousarray(lut, dtype=dtype)))
+
+    entries = []
+    offset = 0
+    for name, arr in arrays:
+        entries.append(
+            {
+                "name": name,
+                "offset": offset,
+                "shape": list(arr.shape),
+                "dtype": dtype.str,
+            }
+        )
+        offset = _align(offset + arr.nbytes)
+
+    # the data offsets depend on the index size, so shift them once it is known
+    def encode_index(data_start):
+        index = {
+            "version": BUNDLE_VERSION,
+            "meta": meta or {},
+            "gaits": [
+                dict(entry, offset=entry["offset"] + data_start) for entry in entries
+            ],
+        }
+        return json.dumps(index).encode("utf-8")
+
+    prefix = len(MAGIC) + 4
+    data_start = _align(prefix + len(encode_index(0)))
+    index = encode_index(data_start)
+    while prefix + len(index) > data_start:
+        data_start = _align(prefix + len(index))
+        index = encode_index(data_start)
+    index = index.ljust(data_start - prefix, b" ")
+
+    with open(filename, "wb") as fp:
+        fp.write(MAGIC)
+        fp.write(struct.pack("<I", len(index)))
+        fp.write(index)
+        for (_, arr), entry in zip(arrays, entries):
+            fp.seek(data_start + entry["offset"])
+            fp.write(arr.tobytes())
+        # keep the size a multiple of the alignment, also for empty arrays
+        fp.truncate(data_start + offset)
+
+
+class LutBundle:
+    """Read-only view of a binary LUT bundle.
+
+    The file is memory-mapped once, and every gait is a zero-copy view into
+    the mapping, so opening a bundle only reads its index, and slicing a gait
+    only touches the pages it needs.
+
+    Args:
+        filename (str): Path of the bundle.
+
+    Raises:
+        ValueError: If the file is not a LUT bundle of a supported version.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+        with open(filename, "rb") as fp:
+            magic = fp.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(filename + " is not a LUT bundle")
+            (index_size,) = struct.unpack("<I", fp.read(4))
+            index = json.loads(fp.read(index_size).decode("utf-8"))
+
+        if index["version"] != BUNDLE_VERSION:
+            raise ValueError(
+                "unsupported LUT bundle version: " + str(index["version"])
+            )
+
+        self.meta = index["meta"]
+        self.entries = {entry["name"]: entry for entry in index["gaits"]}
+        self._mmap = np.memmap(filename, dtype=np.uint8, mode="r")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __getitem__(self, name):
+        """Returns a gait as a read-only view into the mapped file.
+
+        Args:
+            name (str): The gait name.
+
+        Returns:
+            numpy.ndarray: The array of the gait, without copying it.
+        """
+        entry = self.entries[name]
+        return np.ndarray(
+            tuple(entry["shape"]),
+            dtype=np.dtype(entry["dtype"]),
+            buffer=self._mmap,
+            offset=entry["offset"],
+        )
+
+    def names(self):
+        """Returns the gait names, in file order.
+
+        Returns:
+            list: The gait names.
+        """
+        return list(self.entries)
+
+    def close(self):
+        """Releases the memory mapping.
+
+        Views returned by `__getitem__` keep the mapping alive until they are
+        released too.
+        """
+        self._mmap = None
@@ -0,0 +1,1118 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from hexapod_model import HexapodModel, angles_to_ticks, ticks_to_angles
+from hexapod_model import SERVO_MIN, SERVO_MAX
+from lut_encoding import encode_lut, encoding_report, render_encoded_lut, ENCODINGS
+from lut_validator import validate_luts, format_issue, gait_limits
+from lut_validator import DELAY_MS, MAX_VELOCITY, MAX_ACCELERATION
+from transition import transition_angles, render_transitions
+from resample import resample_path, resample_periodic
+from gait_optimizer import optimize_gait, optimized_spec, OBJECTIVES
+from lut_bundle import write_bundle
+from header_parser import load_motion_header
+from path_tool import gen_walk_path, gen_fastwalk_path, gen_turn_path, gen_climb_path
+from path_tool import (
+    gen_rotatex_path,
+    gen_rotatey_path,
+    gen_rotatez_path,
+    gen_twist_path,
+)
+from path_tool import gen_standup_path
+
+# bump when a change in the generators invalidates previously cached LUTs
+CACHE_VERSION = 1
+
+HEADER_PREAMBLE = (
+    "/**\n"
+    " * This is an automatically generated header, which includes motion path LUTs\n"
+    " * \n"
+    " * - Copyright (C) 2024 - PRESENT  rookidroid.com\n"
+    " * - E-mail: info@rookidroid.com\n"
+    " * - Website: https://rookidroid.com/\n"
+    " */\n\n"
+    "#ifndef MOTION_H\n"
+    "#define MOTION_H\n\n"
+)
+HEADER_END = "#endif // MOTION_H\n"
+
+TRANSITION_HEADER_PREAMBLE = HEADER_PREAMBLE.replace("MOTION_H", "TRANSITIONS_H")
+TRANSITION_HEADER_END = HEADER_END.replace("MOTION_H", "TRANSITIONS_H")
+
+# generators of the periodic gaits, called as generator(standby, **params)
+GENERATORS = {
+    "walk": gen_walk_path,
+    "fastwalk": gen_fastwalk_path,
+    "turn": gen_turn_path,
+    "climb": gen_climb_path,
+    "rotatex": gen_rotatex_path,
+    "rotatey": gen_rotatey_path,
+    "rotatez": gen_rotatez_path,
+    "twist": gen_twist_path,
+}
+
+# generators of the gaits that run once instead of looping
+ONE_SHOT_GENERATORS = ("standup",)
+
+# the number of issues listed in the error of a failed validation
+MAX_REPORTED_ISSUES = 20
+
+
+def load_json(filename):
+    """Loads a JSON file.
+
+    Args:
+        filename (str): Path to the JSON file.
+
+    Returns:
+        dict: The decoded content.
+    """
+    with open(filename, "r", encoding="utf-8") as read_file:
+        return json.load(read_file)
+
+
+def gait_hash(config, spec, gait):
+    """Computes the content hash of a gait.
+
+    The hash covers everything the LUT of the gait depends on: the robot
+    configuration, the servo range, the standby/laydown postures and the
+    generator parameters.
+
+    Args:
+        config (dict): The hexapod's configuration parameters (`config.json`).
+        spec (dict): The gait specification (`gaits.json`).
+        gait (dict): One entry of `spec["gaits"]`.
+
+    Returns:
+        str: The hexadecimal SHA-1 digest.
+    """
+    content = {
+        "version": CACHE_VERSION,
+        "config": config,
+        "servo": [spec["servoMin"], spec["servoMax"]],
+        "posture": [spec["standbyPosture"], spec["laydownPosture"]],
+        "generator": gait["generator"],
+        "params": gait.get("params", {}),
+    }
+    if "resample" in gait:
+        content["resample"] = gait["resample"]
+    return hashlib.sha1(
+        json.dumps(content, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def gen_gait_path(model, spec, gait):
+    """Generates the leg tip path of one gait.
+
+    A gait with `"resample": {"steps": N}` is resampled to N steps with
+    periodic cubic splines. With `"space": "joint"` the resampling happens
+    after the IK instead, see `resample_angles`.
+
+    Args:
+        model (HexapodModel): The compiled hexapod model.
+        spec (dict): The gait specification (`gaits.json`).
+        gait (dict): One entry of `spec["gaits"]`.
+
+    Returns:
+        numpy.ndarray: The path, with shape (steps, 6, 3).
+
+    Raises:
+        ValueError: If a gait that runs once is resampled.
+    """
+    standby = model.gen_posture(*spec["standbyPosture"])
+    params = gait.get("params", {})
+
+    if "resample" in gait and gait["generator"] in ONE_SHOT_GENERATORS:
+        raise ValueError("only looping gaits can be resampled: " + gait["name"])
+
+    if gait["generator"] == "standby":
+        path = standby[np.newaxis, :, :]
+    elif gait["generator"] == "standup":
+        laydown = model.gen_posture(*spec["laydownPosture"])
+        return gen_standup_path(standby, laydown, **params)
+    else:
+        path = GENERATORS[gait["generator"]](standby, **params)
+
+    resample = gait.get("resample", {})
+    if resample and resample.get("space", "cartesian") == "cartesian":
+        path = resample_path(path, resample["steps"])
+    return path
+
+
+def resample_angles(gait, angles):
+    """Applies the joint space resampling of a gait to its joint angles.
+
+    Args:
+        gait (dict): One entry of `spec["gaits"]`.
+        angles (numpy.ndarray): The joint angles of the path from
+            `gen_gait_path`, with shape (steps, 6, 3).
+
+    Returns:
+        numpy.ndarray: The joint angles, resampled if the gait asks for
+        `"space": "joint"`.
+    """
+    resample = gait.get("resample", {})
+    if resample and resample.get("space", "cartesian") == "joint":
+        return resample_periodic(angles, resample["steps"])
+    return angles
+
+
+def compile_gait(model, spec, gait):
+    """Generates one gait and solves it into servo ticks.
+
+    Args:
+        model (HexapodModel): The compiled hexapod model.
+        spec (dict): The gait specification (`gaits.json`).
+        gait (dict): One entry of `spec["gaits"]`.
+
+    Returns:
+        numpy.ndarray: The servo ticks, with shape (steps, 6, 3).
+    """
+    path = gen_gait_path(model, spec, gait)
+    return angles_to_ticks(
+        resample_angles(gait, model.inverse_kinematics(path)),
+        spec["servoMin"],
+        spec["servoMax"],
+    )
+
+
+def render_lut(name, lut):
+    """Renders one LUT as C source.
+
+    Args:
+        name (str): The name of the LUT variable.
+        lut (numpy.ndarray): The servo ticks, with shape (steps, 6, 3).
+
+    Returns:
+        str: The declarations of `<name>_length` and `<name>`.
+    """
+    steps = np.shape(lut)[0]
+    rows = ["{%d, %d, %d}" % row for row in map(tuple, np.reshape(lut, (-1, 3)))]
+    frames = [
+        "{" + ",\n                                   ".join(rows[idx : idx + 6]) + "}"
+        for idx in range(0, len(rows), 6)
+    ]
+
+    return (
+        "static int " + name + "_length = " + str(steps) + ";\n"
+        "static int " + name + "[" + str(steps) + "][6][3] = {"
+        + ",\n                                  ".join(frames)
+        + "};\n\n"
+    )
+
+
+def render_header(luts, encoding="int", servo_mid=None):
+    """Renders the complete `motion.h` header.
+
+    Args:
+        luts (dict): The servo ticks keyed by LUT name, in output order.
+        encoding (str, optional): One of `lut_encoding.ENCODINGS`. Defaults to "int".
+        servo_mid (int, optional): The tick at 90 deg, used by the "shared"
+            encoding. Defaults to None, which uses `hexapod_model.SERVO_MID`.
+
+    Returns:
+        str: The content of the header.
+    """
+    if encoding == "int":
+        body = "".join(render_lut(name, lut) for name, lut in luts.items())
+    else:
+        kwargs = {} if servo_mid is None else {"servo_mid": servo_mid}
+        body = "#include <stdint.h>\n\n" + "".join(
+            render_encoded_lut(name, encode_lut(lut, encoding, **kwargs))
+            for name, lut in luts.items()
+        )
+
+    return HEADER_PREAMBLE + body + HEADER_END
+
+
+def _raise_issues(issues):
+    """Raises the issues of `validate_luts`, if there are any.
+
+    Args:
+        issues (list): The `Issue`s found.
+
+    Raises:
+        ValueError: If `issues` is not empty, listing the first
+            `MAX_REPORTED_ISSUES` of them.
+    """
+    if not issues:
+        return
+
+    lines = [format_issue(issue) for issue in issues[:MAX_REPORTED_ISSUES]]
+    if len(issues) > MAX_REPORTED_ISSUES:
+        lines.append("... and " + str(len(issues) - MAX_REPORTED_ISSUES) + " more")
+    raise ValueError(str(len(issues)) + " invalid LUT values:\n" + "\n".join(lines))
+
+
+def _quantize_angles(angles, spec):
+    """Rounds joint angles to the servo ticks the firmware plays.
+
+    Args:
+        angles (numpy.ndarray): The joint angles in degrees, NaN where the IK
+            has no solution.
+        spec (dict): The gait specification (`gaits.json`).
+
+    Returns:
+        tuple: (ticks, tick_angles), the servo ticks and their joint angles,
+        which keep the NaN of `angles` for `validate_luts`.
+    """
+    with np.errstate(invalid="ignore"):
+        ticks = angles_to_ticks(angles, spec["servoMin"], spec["servoMax"])
+    tick_angles = np.where(
+        np.isnan(angles),
+        np.nan,
+        ticks_to_angles(ticks, spec["servoMin"], spec["servoMax"]),
+    )
+    return ticks, tick_angles
+
+
+def compile_luts(
+    config,
+    spec,
+    cache_dir=".lut_cache",
+    force=False,
+    validate=True,
+    limits=None,
+):
+    """Compiles all the gaits of a specification, regenerating only the changed ones.
+
+    The servo ticks of every gait are cached on disk under the content hash
+    of the gait, so a gait is only regenerated when its parameters, the
+    postures, the servo range or the robot configuration change.
+
+    Before anything is cached, all the gaits are validated together with
+    `lut_validator.validate_luts`, so a NaN or out-of-range angle never ends
+    up as garbage PWM in the header. The `"limits"` of a gait in the
+    specification take precedence over `limits`.
+
+    Args:
+        config (dict): The hexapod's configuration parameters (`config.json`).
+        spec (dict): The gait specification (`gaits.json`).
+        cache_dir (str, optional): Directory of the LUT cache.
+            Defaults to ".lut_cache".
+        force (bool, optional): Whether to ignore the cache and regenerate all
+            the gaits. Defaults to False.
+        validate (bool, optional): Whether to validate the gaits.
+            Defaults to True.
+        limits (dict, optional): Keyword arguments of `validate_luts`, e.g.
+            "max_velocity", "max_acceleration" or "delay_ms". Defaults to None.
+
+    Returns:
+        tuple: (luts, rebuilt), where `luts` is a dict of servo ticks keyed by
+        LUT name, and `rebuilt` is the list of regenerated LUT names.
+
+    Raises:
+        ValueError: If the validation fails. Nothing is cached then.
+    """
+    model = HexapodModel(config)
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    luts = {}
+    angles = {}
+    dirty = []
+    for gait in spec["gaits"]:
+        cache_file = os.path.join(cache_dir, gait_hash(config, spec, gait) + ".npy")
+
+        if not force and os.path.exists(cache_file):
+            luts[gait["name"]] = np.load(cache_file)
+            angles[gait["name"]] = ticks_to_angles(
+                luts[gait["name"]], spec["servoMin"], spec["servoMax"]
+            )
+        else:
+            luts[gait["name"]] = None
+            dirty.append((gait, cache_file))
+
+    if dirty:
+        # solve all the frames of all the changed gaits in one IK pass
+        paths = [gen_gait_path(model, spec, gait) for gait, _ in dirty]
+        with np.errstate(invalid="ignore"):
+            dirty_angles = model.inverse_kinematics(np.concatenate(paths))
+        splits = np.cumsum([np.shape(path)[0] for path in paths])[:-1]
+
+        for (gait, _), gait_angles in zip(dirty, np.split(dirty_angles, splits)):
+            # validate the angles of the ticks, like the ones of the cached gaits
+            luts[gait["name"]], angles[gait["name"]] = _quantize_angles(
+                resample_angles(gait, gait_angles), spec
+            )
+
+    if validate:
+        kwargs = {"servo_min": spec["servoMin"], "servo_max": spec["servoMax"]}
+        kwargs.update(limits or {})
+        periodic = {
+            gait["name"]: gait["generator"] not in ONE_SHOT_GENERATORS
+            for gait in spec["gaits"]
+        }
+        overrides = {gait["name"]: gait_limits(gait) for gait in spec["gaits"]}
+        _raise_issues(validate_luts(angles, periodic, overrides=overrides, **kwargs))
+
+    for gait, cache_file in dirty:
+        # several processes of a batch build may write the same entry, so
+        # replace the file atomically
+        tmp_file = cache_file[: -len(".npy")] + "." + str(os.getpid()) + ".tmp.npy"
+        np.save(tmp_file, luts[gait["name"]])
+        os.replace(tmp_file, cache_file)
+
+    rebuilt = [gait["name"] for gait, _ in dirty]
+    return luts, rebuilt
+
+
+def write_header(output, luts, spec, encoding="int", bundle=None):
+    """Writes the motion header of compiled LUTs.
+
+    Args:
+        output (str): Path of the generated header.
+        luts (dict): The servo ticks keyed by LUT name, in output order.
+        spec (dict): The gait specification (`gaits.json`).
+        encoding (str, optional): One of `lut_encoding.ENCODINGS`. Defaults to "int".
+        bundle (str, optional): Path of a binary LUT bundle to write as well,
+            see `lut_bundle`. Defaults to None.
+    """
+    with open(output, "w", encoding="utf-8", newline="\r\n") as fp:
+        fp.write(
+            render_header(
+                luts, encoding, servo_mid=(spec["servoMin"] + spec["servoMax"]) // 2
+            )
+        )
+
+    if bundle is not None:
+        write_bundle(
+            bundle,
+            luts,
+            meta={"servoMin": spec["servoMin"], "servoMax": spec["servoMax"]},
+        )
+
+
+def build(
+    config_file,
+    spec_file,
+    output,
+    cache_dir=".lut_cache",
+    force=False,
+    encoding="int",
+    validate=True,
+    limits=None,
+    bundle=None,
+):
+    """Builds the motion header, regenerating only the gaits that changed.
+
+    See `compile_luts` for the caching and the validation.
+
+    Args:
+        config_file (str): Path to the hexapod's configuration (`config.json`).
+        spec_file (str): Path to the gait specification (`gaits.json`).
+        output (str): Path of the generated header.
+        cache_dir (str, optional): Directory of the LUT cache.
+            Defaults to ".lut_cache".
+        force (bool, optional): Whether to ignore the cache and regenerate all
+            the gaits. Defaults to False.
+        encoding (str, optional): The storage encoding of the LUTs in the
+            header, one of `lut_encoding.ENCODINGS`. Defaults to "int".
+        validate (bool, optional): Whether to validate the gaits.
+            Defaults to True.
+        limits (dict, optional): Keyword arguments of `validate_luts`, e.g.
+            "max_velocity", "max_acceleration" or "delay_ms". Defaults to None.
+        bundle (str, optional): Path of a binary LUT bundle to write as well,
+            see `lut_bundle`. Defaults to None.
+
+    Returns:
+        tuple: (luts, rebuilt), where `luts` is a dict of servo ticks keyed by
+        LUT name, and `rebuilt` is the list of regenerated LUT names.
+
+    Raises:
+        ValueError: If the validation fails. Nothing is cached or written then.
+    """
+    spec = load_json(spec_file)
+    luts, rebuilt = compile_luts(
+        load_json(config_file), spec, cache_dir, force, validate, limits
+    )
+    write_header(output, luts, spec, encoding, bundle)
+    return luts, rebuilt
+
+
+def _compile_variant(task):
+    """Compiles one (config, spec) variant in a worker process.
+
+    The LUTs are returned in a shared memory block instead of being pickled
+    back to the parent process.
+
+    Args:
+        task (tuple): (config_file, spec_file, cache_dir, force, validate,
+            limits), see `build_batch`.
+
+    Returns:
+        tuple: (shm_name, names, lengths, rebuilt), where the shared memory
+        block `shm_name` holds the int32 servo ticks of all the LUTs `names`
+        concatenated along the frames, with `lengths` frames each. The caller
+        owns the block and must unlink it.
+    """
+    config_file, spec_file, cache_dir, force, validate, limits = task
+
+    luts, rebuilt = compile_luts(
+        load_json(config_file), load_json(spec_file), cache_dir, force, validate, limits
+    )
+    names = list(luts)
+    lengths = [np.shape(luts[name])[0] for name in names]
+
+    shm = shared_memory.SharedMemory(
+        create=True, size=max(int(np.sum(lengths)) * 6 * 3 * 4, 1)
+    )
+    try:
+        frames = np.ndarray((int(np.sum(lengths)), 6, 3), dtype=np.int32, buffer=shm.buf)
+        frames[:] = np.concatenate([luts[name] for name in names])
+        del frames
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    shm.close()
+
+    return shm.name, names, lengths, rebuilt
+
+
+def _variant_names(files):
+    """Returns a short name of every file of a batch build.
+
+    The name is the path without its extension, relative to the deepest
+    directory all the files share, so `a/config.json` and `b/config.json`
+    become "a/config" and "b/config", and a lone `robot_a.json` "robot_a".
+
+    Args:
+        files (list): The paths.
+
+    Returns:
+        dict: The names keyed by path.
+    """
+    paths = {name: os.path.abspath(name) for name in files}
+    root = os.path.commonpath([os.path.dirname(path) for path in paths.values()])
+    return {
+        name: os.path.splitext(os.path.relpath(path, root))[0]
+        for name, path in paths.items()
+    }
+
+
+def variant_outputs(output_dir, config_files, spec_files):
+    """Returns the header paths of the (config, spec) variants of a batch build.
+
+    Args:
+        output_dir (str): The output directory of the batch build.
+        config_files (list): Paths to the hexapod configurations.
+        spec_files (list): Paths to the gait specifications.
+
+    Returns:
+        dict: `<output_dir>/<config name>/<spec name>/motion.h` keyed by
+        (config_file, spec_file), see `_variant_names` for the names.
+
+    Raises:
+        ValueError: If two variants map to the same header, e.g. the same
+            file is given twice.
+    """
+    config_names = _variant_names(config_files)
+    spec_names = _variant_names(spec_files)
+
+    outputs = {}
+    variants = {}
+    for config_file in config_files:
+        for spec_file in spec_files:
+            output = os.path.join(
+                output_dir,
+                config_names[config_file],
+                spec_names[spec_file],
+                "motion.h",
+            )
+            if output in variants:
+                raise ValueError(
+                    "variants "
+                    + " x ".join(variants[output])
+                    + " and "
+                    + config_file
+                    + " x "
+                    + spec_file
+                    + " would both write "
+                    + output
+                )
+            variants[output] = (config_file, spec_file)
+            outputs[(config_file, spec_file)] = output
+    return outputs
+
+
+def build_batch(
+    config_files,
+    spec_files,
+    output_dir,
+    cache_dir=".lut_cache",
+    force=False,
+    encoding="int",
+    validate=True,
+    limits=None,
+    max_workers=None,
+    bundle=False,
+):
+    """Builds the motion headers of many robot variants in parallel.
+
+    Every (config, spec) combination is compiled in a process pool, and the
+    headers are written once all the variants are done, see `variant_outputs`
+    for their paths. A variant that fails does not stop the others.
+
+    The workers hand their LUTs back in POSIX shared memory blocks rather than
+    pickled copies, which the parent process reads and unlinks.
+
+    Args:
+        config_files (list): Paths to the hexapod configurations.
+        spec_files (list): Paths to the gait specifications.
+        output_dir (str): The output directory.
+        cache_dir (str, optional): Directory of the LUT cache, shared by all
+            the variants. Defaults to ".lut_cache".
+        force (bool, optional): Whether to ignore the cache. Defaults to False.
+        encoding (str, optional): One of `lut_encoding.ENCODINGS`. Defaults to "int".
+        validate (bool, optional): Whether to validate the gaits.
+            Defaults to True.
+        limits (dict, optional): Keyword arguments of `validate_luts`.
+            Defaults to None.
+        max_workers (int, optional): The number of worker processes. Defaults
+            to None, which uses all the CPU cores.
+        bundle (bool, optional): Whether to write a binary LUT bundle
+            `motion.lutb` next to every header. Defaults to False.
+
+    Returns:
+        dict: For every (config_file, spec_file), either the tuple
+        (output, rebuilt) of the written header and the regenerated LUT
+        names, or the exception that stopped the variant.
+
+    Raises:
+        ValueError: If two variants map to the same header. Nothing is built
+            then.
+    """
+    outputs = variant_outputs(output_dir, config_files, spec_files)
+    variants = list(outputs)
+
+    # the workers must share the resource tracker of this process, otherwise
+    # their own trackers unlink the result blocks when the workers exit
+    resource_tracker.ensure_running()
+
+    results = {}
+    blocks = {}
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    _compile_variant,
+                    (config_file, spec_file, cache_dir, force, validate, limits),
+                ): (config_file, spec_file)
+                for config_file, spec_file in variants
+            }
+            for future in as_completed(futures):
+                try:
+                    blocks[futures[future]] = future.result()
+                except Exception as err:
+                    results[futures[future]] = err
+
+        for (config_file, spec_file), (shm_name, names, lengths, rebuilt) in list(
+            blocks.items()
+        ):
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                frames = np.ndarray(
+                    (int(np.sum(lengths)), 6, 3), dtype=np.int32, buffer=shm.buf
+                )
+                splits = np.cumsum(lengths)[:-1]
+                luts = dict(zip(names, np.split(frames, splits)))
+
+                output = outputs[(config_file, spec_file)]
+                os.makedirs(os.path.dirname(output), exist_ok=True)
+                write_header(
+                    output,
+                    luts,
+                    load_json(spec_file),
+                    encoding,
+                    os.path.splitext(output)[0] + ".lutb" if bundle else None,
+                )
+                results[(config_file, spec_file)] = (output, rebuilt)
+
+                del luts, frames
+            finally:
+                shm.close()
+                shm.unlink()
+                del blocks[(config_file, spec_file)]
+    finally:
+        # release the blocks of the variants that were never written
+        for shm_name, _, _, _ in blocks.values():
+            shm = shared_memory.SharedMemory(name=shm_name)
+            shm.close()
+            shm.unlink()
+
+    return {variant: results[variant] for variant in variants}
+
+
+def build_transitions(
+    config_file, spec_file, output, pairs, frames=8, validate=True, limits=None
+):
+    """Builds the header of the blends between pairs of gaits.
+
+    Only looping gaits can be blended, the blend leaves gait A at any of its
+    frames and enters gait B at its `entryPhase`. Every blend is validated,
+    together with the frame of gait A before it and the entry frame of gait B
+    after it, as a non-looping sequence, so an unreachable or too fast blend
+    fails the build instead of being written to the header. The blends of a
+    gait resampled in joint space start from the frames of its resampled LUT.
+
+    Args:
+        config_file (str): Path to the hexapod's configuration (`config.json`).
+        spec_file (str): Path to the gait specification (`gaits.json`).
+        output (str): Path of the generated header.
+        pairs (list): The ordered (gait A, gait B) name pairs.
+        frames (int, optional): The number of frames of a blend. Defaults to 8.
+        validate (bool, optional): Whether to validate the blends.
+            Defaults to True.
+        limits (dict, optional): Keyword arguments of `validate_luts`, e.g.
+            "max_velocity", "max_acceleration" or "delay_ms". Defaults to None.
+            A blend gets the higher of the `"limits"` of its two gaits in the
+            specification, where they have any.
+
+    Returns:
+        dict: The servo ticks of the blends keyed by (gait A, gait B), each
+        with shape (steps_a, frames, 6, 3), indexed by the phase of gait A.
+
+    Raises:
+        ValueError: If a gait of `pairs` is not in the specification or does
+            not loop, or if the validation fails. Nothing is written then.
+    """
+    spec = load_json(spec_file)
+    model = HexapodModel(load_json(config_file))
+
+    gaits = {gait["name"]: gait for gait in spec["gaits"]}
+    names = sorted(set(name for pair in pairs for name in pair))
+    for name in names:
+        if name not in gaits:
+            raise ValueError("unknown gait: " + name)
+        if gaits[name]["generator"] in ONE_SHOT_GENERATORS:
+            raise ValueError("cannot blend the one-shot gait " + name)
+
+    paths = {}
+    gait_angles = {}
+    for name in names:
+        path = gen_gait_path(model, spec, gaits[name])
+        with np.errstate(invalid="ignore"):
+            gait_angles[name] = resample_angles(
+                gaits[name], model.inverse_kinematics(path)
+            )
+        # a gait resampled in joint space plays other frames than its path,
+        # blend from the leg tips of its LUT so the phases match
+        if gaits[name].get("resample", {}).get("space", "cartesian") == "joint":
+            path = model.forward_kinematics(gait_angles[name])
+        paths[name] = path
+
+    entry_phase = {name: gaits[name].get("entryPhase", 0) for name in names}
+    table = {}
+    angles = {}
+    for pair, pair_angles in transition_angles(
+        model, paths, pairs, frames, entry_phase
+    ).items():
+        table[pair], angles[pair] = _quantize_angles(pair_angles, spec)
+
+    if validate:
+        gait_angles = {
+            name: _quantize_angles(name_angles, spec)[1]
+            for name, name_angles in gait_angles.items()
+        }
+        kwargs = {"servo_min": spec["servoMin"], "servo_max": spec["servoMax"]}
+        kwargs.update(limits or {})
+
+        sequences = {}
+        overrides = {}
+        for (name_a, name_b), blend in angles.items():
+            limits_a = gait_limits(gaits[name_a])
+            limits_b = gait_limits(gaits[name_b])
+            pair_limits = {
+                key: max(
+                    limits_a.get(key, kwargs.get(key, default)),
+                    limits_b.get(key, kwargs.get(key, default)),
+                )
+                for key, default in (
+                    ("max_velocity", MAX_VELOCITY),
+                    ("max_acceleration", MAX_ACCELERATION),
+                )
+            }
+
+            entry = gait_angles[name_b][entry_phase[name_b]]
+            for phase, phase_blend in enumerate(blend):
+                name = name_a + "_to_" + name_b + "[" + str(phase) + "]"
+                sequences[name] = np.concatenate(
+                    (gait_angles[name_a][[phase]], phase_blend, entry[np.newaxis])
+                )
+                overrides[name] = pair_limits
+
+        _raise_issues(
+            validate_luts(
+                sequences,
+                {name: False for name in sequences},
+                overrides=overrides,
+                **kwargs
+            )
+        )
+
+    with open(output, "w", encoding="utf-8", newline="\r\n") as fp:
+        fp.write(
+            TRANSITION_HEADER_PREAMBLE
+            + render_transitions(table)
+            + TRANSITION_HEADER_END
+        )
+
+    return table
+
+
+def _limits(args):
+    """Returns the validation limits of the parsed command line.
+
+    Args:
+        args (argparse.Namespace): The arguments of a subcommand that has the
+            options of `limits_parser`.
+
+    Returns:
+        dict: The "delay_ms", "max_velocity" and "max_acceleration".
+    """
+    return {
+        "delay_ms": args.delay_ms,
+        "max_velocity": args.max_velocity,
+        "max_acceleration": args.max_acceleration,
+    }
+
+
+def main(argv=None):
+    """Command line entry point, e.g. `python -m path_tool build`.
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to None,
+            which reads `sys.argv`.
+    """
+    parser = argparse.ArgumentParser(
+        prog="path_tool", description="Hexapod motion LUT compiler"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # validation limits shared by the subcommands that generate LUTs
+    limits_parser = argparse.ArgumentParser(add_help=False)
+    limits_parser.add_argument(
+        "--delay-ms",
+        type=float,
+        default=DELAY_MS,
+        help="frame period of the firmware in ms",
+    )
+    limits_parser.add_argument(
+        "--max-velocity",
+        type=float,
+        default=MAX_VELOCITY,
+        help="joint speed limit in deg/s",
+    )
+    limits_parser.add_argument(
+        "--max-acceleration",
+        type=float,
+        default=MAX_ACCELERATION,
+        help="joint acceleration limit in deg/s^2",
+    )
+
+    build_parser = subparsers.add_parser(
+        "build", parents=[limits_parser], help="generate the motion header"
+    )
+    build_parser.add_argument("--config", default="config.json")
+    build_parser.add_argument("--spec", default="gaits.json")
+    build_parser.add_argument("--output", default="motion.h")
+    build_parser.add_argument("--cache-dir", default=".lut_cache")
+    build_parser.add_argument(
+        "--force", action="store_true", help="ignore the cache and rebuild all gaits"
+    )
+    build_parser.add_argument(
+        "--encoding",
+        choices=ENCODINGS,
+        default="int",
+        help="storage encoding of the LUTs",
+    )
+    build_parser.add_argument(
+        "--bundle", default=None, help="also write a binary LUT bundle to this path"
+    )
+    build_parser.add_argument(
+        "--no-validate",
+        action="store_true",
+        help="skip the NaN, servo range, velocity and acceleration checks",
+    )
+    build_parser.add_argument(
+        "--report",
+        action="store_true",
+        help="print the bytes saved by the encoding for every gait",
+    )
+
+    transitions_parser = subparsers.add_parser(
+        "transitions",
+        parents=[limits_parser],
+        help="generate the blends between pairs of gaits",
+    )
+    transitions_parser.add_argument("--config", default="config.json")
+    transitions_parser.add_argument("--spec", default="gaits.json")
+    transitions_parser.add_argument("--output", default="transitions.h")
+    transitions_parser.add_argument(
+        "--pair",
+        action="append",
+        required=True,
+        metavar="FROM:TO",
+        help="gait names to blend, e.g. lut_walk_0:lut_turn_left, repeatable",
+    )
+    transitions_parser.add_argument(
+        "--frames", type=int, default=8, help="number of frames of a blend"
+    )
+    transitions_parser.add_argument(
+        "--no-validate",
+        action="store_true",
+        help="skip the NaN, servo range, velocity and acceleration checks",
+    )
+
+    batch_parser = subparsers.add_parser(
+        "batch",
+        parents=[limits_parser],
+        help="generate the motion headers of many robot variants",
+    )
+    batch_parser.add_argument("--config", nargs="+", required=True)
+    batch_parser.add_argument("--spec", nargs="+", default=["gaits.json"])
+    batch_parser.add_argument(
+        "--output-dir",
+        default="build",
+        help="headers go to <output-dir>/<config>/<spec>/motion.h, with the paths "
+        "relative to the directory the configs, or the specs, share",
+    )
+    batch_parser.add_argument("--cache-dir", default=".lut_cache")
+    batch_parser.add_argument(
+        "--force", action="store_true", help="ignore the cache and rebuild all gaits"
+    )
+    batch_parser.add_argument("--encoding", choices=ENCODINGS, default="int")
+    batch_parser.add_argument(
+        "--no-validate",
+        action="store_true",
+        help="skip the NaN, servo range, velocity and acceleration checks",
+    )
+    batch_parser.add_argument(
+        "--workers", type=int, default=None, help="number of worker processes"
+    )
+    batch_parser.add_argument(
+        "--bundle",
+        action="store_true",
+        help="also write a binary LUT bundle motion.lutb next to every header",
+    )
+
+    convert_parser = subparsers.add_parser(
+        "convert", help="convert an existing motion header"
+    )
+    convert_parser.add_argument("input", help="motion header to read")
+    convert_parser.add_argument("--output", default=None, help="header to write")
+    convert_parser.add_argument("--encoding", choices=ENCODINGS, default="int")
+    convert_parser.add_argument(
+        "--bundle", default=None, help="binary LUT bundle to write"
+    )
+    convert_parser.add_argument("--servo-min", type=int, default=SERVO_MIN)
+    convert_parser.add_argument("--servo-max", type=int, default=SERVO_MAX)
+
+    optimize_parser = subparsers.add_parser(
+        "optimize",
+        parents=[limits_parser],
+        help="search the generator parameters of gaits",
+    )
+    optimize_parser.add_argument("--config", default="config.json")
+    optimize_parser.add_argument("--spec", default="gaits.json")
+    optimize_parser.add_argument(
+        "--output",
+        default="gaits_optimized.json",
+        help="gait specification with the optimized parameters, for build --spec",
+    )
+    optimize_parser.add_argument(
+        "--gait",
+        action="append",
+        required=True,
+        help="name of a walk, fastwalk or climb gait to optimize, repeatable",
+    )
+    optimize_parser.add_argument("--objective", choices=OBJECTIVES, default="speed")
+    optimize_parser.add_argument("--population", type=int, default=64)
+    optimize_parser.add_argument("--generations", type=int, default=10)
+    optimize_parser.add_argument(
+        "--min-speed", type=float, default=10.0, help="lowest body speed in mm/s"
+    )
+    optimize_parser.add_argument(
+        "--workers", type=int, default=None, help="number of worker processes"
+    )
+    optimize_parser.add_argument("--seed", type=int, default=None)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        try:
+            luts, rebuilt = build(
+                args.config,
+                args.spec,
+                args.output,
+                args.cache_dir,
+                args.force,
+                args.encoding,
+                validate=not args.no_validate,
+                limits=_limits(args),
+                bundle=args.bundle,
+            )
+        except ValueError as err:
+            parser.exit(1, str(err) + "\n")
+        print(
+            "Wrote "
+            + args.output
+            + ": "
+            + str(len(luts))
+            + " gaits, "
+            + str(len(rebuilt))
+            + " regenerated"
+        )
+
+        if args.report:
+            spec = load_json(args.spec)
+            report = encoding_report(
+                luts, args.encoding, (spec["servoMin"] + spec["servoMax"]) // 2
+            )
+            for name, int_bytes, encoded_bytes in report:
+                print(
+                    "{:<24}{:>8} B{:>8} B{:>8} B saved".format(
+                        name, int_bytes, encoded_bytes, int_bytes - encoded_bytes
+                    )
+                )
+            total_int = sum(row[1] for row in report)
+            total_encoded = sum(row[2] for row in report)
+            print(
+                "{:<24}{:>8} B{:>8} B{:>8} B saved".format(
+                    "total", total_int, total_encoded, total_int - total_encoded
+                )
+            )
+
+    elif args.command == "batch":
+        try:
+            results = build_batch(
+                args.config,
+                args.spec,
+                args.output_dir,
+                args.cache_dir,
+                args.force,
+                args.encoding,
+                validate=not args.no_validate,
+                limits=_limits(args),
+                max_workers=args.workers,
+                bundle=args.bundle,
+            )
+        except ValueError as err:
+            parser.exit(1, str(err) + "\n")
+        failed = 0
+        for (config_file, spec_file), result in results.items():
+            if isinstance(result, Exception):
+                failed += 1
+                print(config_file + " x " + spec_file + ": " + str(result))
+            else:
+                output, rebuilt = result
+                print(
+                    "Wrote " + output + ": " + str(len(rebuilt)) + " regenerated"
+                )
+        if failed:
+            parser.exit(1, str(failed) + " of " + str(len(results)) + " failed\n")
+
+    elif args.command == "convert":
+        servo_spec = {"servoMin": args.servo_min, "servoMax": args.servo_max}
+        try:
+            luts = load_motion_header(
+                args.input, (args.servo_min + args.servo_max) // 2
+            )
+        except ValueError as err:
+            parser.exit(1, args.input + ": " + str(err) + "\n")
+
+        if args.output is not None:
+            with open(args.output, "w", encoding="utf-8", newline="\r\n") as fp:
+                fp.write(
+                    render_header(
+                        luts, args.encoding, (args.servo_min + args.servo_max) // 2
+                    )
+                )
+        if args.bundle is not None:
+            write_bundle(args.bundle, luts, meta=servo_spec)
+        print("Read " + args.input + ": " + str(len(luts)) + " gaits")
+
+    elif args.command == "transitions":
+        pairs = [tuple(pair.split(":", 1)) for pair in args.pair]
+        if any(len(pair) != 2 for pair in pairs):
+            parser.error("--pair must be FROM:TO")
+        try:
+            table = build_transitions(
+                args.config,
+                args.spec,
+                args.output,
+                pairs,
+                args.frames,
+                validate=not args.no_validate,
+                limits=_limits(args),
+            )
+        except ValueError as err:
+            parser.exit(1, str(err) + "\n")
+        print("Wrote " + args.output + ": " + str(len(table)) + " transitions")
+
+    elif args.command == "optimize":
+        config = load_json(args.config)
+        spec = load_json(args.spec)
+        gaits = {gait["name"]: gait for gait in spec["gaits"]}
+
+        results = {}
+        for name in args.gait:
+            if name not in gaits:
+                parser.exit(1, "unknown gait: " + name + "\n")
+            try:
+                params, cost = optimize_gait(
+                    config,
+                    spec,
+                    gaits[name],
+                    args.objective,
+                    population=args.population,
+                    generations=args.generations,
+                    min_speed=args.min_speed,
+                    limits=_limits(args),
+                    max_workers=args.workers,
+                    seed=args.seed,
+                )
+            except ValueError as err:
+                parser.exit(1, str(err) + "\n")
+
+            if np.isfinite(cost):
+                results[name] = params
+                print(name + ": " + json.dumps(params) + ", cost " + str(cost))
+            else:
+                print(name + ": no feasible parameters found, kept as is")
+
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump(optimized_spec(spec, results), fp, indent=4)
+        print("Wrote " + args.output)
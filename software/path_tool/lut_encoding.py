@@ -0,0 +1,248 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import numpy as np
+
+from hexapod_model import SERVO_MID
+
+# available LUT encodings
+#   - int: `int lut[N][6][3]`, the layout `hexapod_arduino.ino` reads today
+#   - uint16: `uint16_t lut[N][6][3]`
+#   - delta: the first frame as uint16_t plus int8_t frame-to-frame deltas
+#   - shared: unique uint16_t leg curves, and for every leg a reference to one
+#     curve with a phase offset and a per-joint mirror mask
+ENCODINGS = ("int", "uint16", "delta", "shared")
+
+C_TYPES = {
+    np.dtype(np.int32): "int",
+    np.dtype(np.uint16): "uint16_t",
+    np.dtype(np.int8): "int8_t",
+}
+
+
+def mirror_ticks(ticks, mask, servo_mid):
+    """Mirrors the servo ticks of the selected joints around the middle tick.
+
+    Args:
+        ticks (numpy.ndarray): The servo ticks, with shape (..., 3).
+        mask (int): Bit `j` set mirrors joint `j`.
+        servo_mid (int): The tick at 90 deg.
+
+    Returns:
+        numpy.ndarray: The mirrored ticks, with the same shape as `ticks`.
+    """
+    bits = (mask >> np.arange(3)) & 1
+    return np.where(bits, 2 * servo_mid - ticks, ticks)
+
+
+def _encode_shared(lut, servo_mid):
+    steps = np.shape(lut)[0]
+    rolls = (np.arange(steps)[:, np.newaxis] + np.arange(steps)) % steps
+
+    curves = []
+    refs = np.zeros((6, 3), dtype=np.uint16)
+    for leg_idx in range(6):
+        leg = lut[:, leg_idx, :]
+        found = False
+        for curve_idx, curve in enumerate(curves):
+            # all the phase shifted copies of the curve, (phase, steps, 3)
+            shifted = curve[rolls]
+            for mask in range(8):
+                match = np.flatnonzero(
+                    np.all(shifted == mirror_ticks(leg, mask, servo_mid), axis=(1, 2))
+                )
+                if match.size > 0:
+                    refs[leg_idx] = (curve_idx, match[0], mask)
+                    found = True
+                    break
+            if found:
+                break
+
+        if not found:
+            refs[leg_idx] = (len(curves), 0, 0)
+            curves.append(leg)
+
+    return {"curves": np.array(curves, dtype=np.uint16), "refs": refs}
+
+
+def encode_lut(lut, encoding, servo_mid=SERVO_MID):
+    """Encodes a LUT of servo ticks.
+
+    Args:
+        lut (numpy.ndarray): The servo ticks, with shape (steps, 6, 3).
+        encoding (str): One of `ENCODINGS`.
+        servo_mid (int, optional): The tick at 90 deg, used by the mirrored
+            curves of the "shared" encoding. Defaults to SERVO_MID.
+
+    Returns:
+        dict: The arrays of the encoded LUT keyed by their suffix, in the
+        order they are declared in C.
+
+    Raises:
+        ValueError: If the encoding is unknown, or a value does not fit the
+            storage type of the encoding.
+    """
+    lut = np.asarray(lut)
+
+    if encoding == "int":
+        return {"": lut.astype(np.int32)}
+
+    if lut.min() < 0 or lut.max() > np.iinfo(np.uint16).max:
+        raise ValueError("servo ticks out of the uint16_t range")
+
+    if encoding == "uint16":
+        return {"": lut.astype(np.uint16)}
+
+    if encoding == "delta":
+        delta = np.diff(lut.astype(int), axis=0)
+        if delta.size > 0 and (
+            delta.min() < np.iinfo(np.int8).min or delta.max() > np.iinfo(np.int8).max
+        ):
+            raise ValueError("frame-to-frame delta out of the int8_t range")
+        encoded = {"base": lut[0].astype(np.uint16)}
+        if delta.size > 0:
+            # C does not allow zero-length arrays, single frame LUTs only keep the base
+            encoded["delta"] = delta.astype(np.int8)
+        return encoded
+
+    if encoding == "shared":
+        return _encode_shared(lut, servo_mid)
+
+    raise ValueError("unknown LUT encoding: " + str(encoding))
+
+
+def decode_lut(encoded, encoding, servo_mid=SERVO_MID):
+    """Decodes a LUT produced by `encode_lut`.
+
+    Args:
+        encoded (dict): The encoded arrays.
+        encoding (str): One of `ENCODINGS`.
+        servo_mid (int, optional): The tick at 90 deg. Must match the value
+            used for encoding. Defaults to SERVO_MID.
+
+    Returns:
+        numpy.ndarray: The servo ticks, with shape (steps, 6, 3).
+
+    Raises:
+        ValueError: If the encoding is unknown.
+    """
+    if encoding in ("int", "uint16"):
+        return encoded[""].astype(int)
+
+    if encoding == "delta":
+        base = encoded["base"].astype(int)[np.newaxis, :, :]
+        if "delta" not in encoded:
+            return base
+        return np.concatenate(
+            (base, base + np.cumsum(encoded["delta"].astype(int), axis=0))
+        )
+
+    if encoding == "shared":
+        curves = encoded["curves"].astype(int)
+        refs = encoded["refs"].astype(int)
+        steps = np.shape(curves)[1]
+
+        lut = np.empty((steps, 6, 3), dtype=int)
+        for leg_idx, (curve_idx, phase, mask) in enumerate(refs):
+            lut[:, leg_idx, :] = mirror_ticks(
+                np.roll(curves[curve_idx], -phase, axis=0), mask, servo_mid
+            )
+        return lut
+
+    raise ValueError("unknown LUT encoding: " + str(encoding))
+
+
+def encoded_size(encoded):
+    """Returns the storage size of an encoded LUT.
+
+    Args:
+        encoded (dict): The encoded arrays.
+
+    Returns:
+        int: The size in bytes.
+    """
+    return int(sum(arr.nbytes for arr in encoded.values()))
+
+
+def _render_array(arr):
+    if arr.ndim == 1:
+        return "{" + ", ".join(str(val) for val in arr.tolist()) + "}"
+    return "{" + ",\n ".join(_render_array(sub) for sub in arr) + "}"
+
+
+def render_encoded_lut(name, encoded):
+    """Renders an encoded LUT as C source.
+
+    Args:
+        name (str): The name of the LUT variable.
+        encoded (dict): The encoded arrays, as returned by `encode_lut` with
+            an encoding other than "int".
+
+    Returns:
+        str: The declarations of `<name>_length` and the encoded arrays.
+    """
+    if "curves" in encoded:
+        steps = np.shape(encoded["curves"])[1]
+    elif "base" in encoded:
+        steps = np.shape(encoded.get("delta", ()))[0] + 1
+    else:
+        steps = np.shape(encoded[""])[0]
+
+    text = "static const int " + name + "_length = " + str(steps) + ";\n"
+    for suffix, arr in encoded.items():
+        dims = "".join("[" + str(dim) + "]" for dim in np.shape(arr))
+        text += (
+            "static const "
+            + C_TYPES[arr.dtype]
+            + " "
+            + name
+            + ("_" + suffix if suffix else "")
+            + dims
+            + " = "
+            + _render_array(arr)
+            + ";\n"
+        )
+    return text + "\n"
+
+
+def encoding_report(luts, encoding, servo_mid=SERVO_MID):
+    """Compares the storage size of every LUT with the plain int encoding.
+
+    Args:
+        luts (dict): The servo ticks keyed by LUT name.
+        encoding (str): One of `ENCODINGS`.
+        servo_mid (int, optional): The tick at 90 deg. Defaults to SERVO_MID.
+
+    Returns:
+        list: One (name, int_bytes, encoded_bytes) tuple per LUT.
+    """
+    return [
+        (
+            name,
+            encoded_size(encode_lut(lut, "int")),
+            encoded_size(encode_lut(lut, encoding, servo_mid)),
+        )
+        for name, lut in luts.items()
+    ]
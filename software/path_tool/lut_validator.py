@@ -0,0 +1,237 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+from collections import namedtuple
+
+import numpy as np
+
+from hexapod_model import SERVO_MIN, SERVO_MAX
+
+DELAY_MS = 12  # frame period of the firmware, matches DELAY_MS in config.h
+
+# default limits, from the servos: the MG92B is rated 0.11 s/60 deg at 6 V (the
+# servo rail of the robot), the slower of the MG92B/MG90S the robot can mix
+MAX_VELOCITY = 545  # deg/s
+# the PCA9685 refreshes the pulse every 1 / 60 Hz = 16.7 ms, a servo is assumed
+# to reach its rated speed within one refresh, 545 / 0.0167
+MAX_ACCELERATION = 32700  # deg/s^2
+WRAP_TOLERANCE = 1.0  # deg
+
+# per-gait limits of a gait specification, `"limits": {"maxVelocity": ...}`,
+# and the matching keyword arguments of `validate_luts`
+SPEC_LIMITS = {"maxVelocity": "max_velocity", "maxAcceleration": "max_acceleration"}
+
+CHECKS = ("nan", "range", "velocity", "acceleration", "wrap")
+
+# one failed check of one joint, `step` is the frame index inside the gait, for
+# "velocity" and "wrap" the step starts at that frame
+Issue = namedtuple("Issue", ["gait", "check", "step", "leg", "joint", "value"])
+
+
+def _next_frame(lengths, periodic):
+    """Returns the index of the next frame of every frame of concatenated gaits.
+
+    Args:
+        lengths (numpy.ndarray): The number of frames of every gait.
+        periodic (numpy.ndarray): Whether every gait loops back to its first frame.
+
+    Returns:
+        tuple: (next_idx, has_next), the index of the next frame and whether it
+        exists, both with shape (frames,).
+    """
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    ends = starts + lengths - 1
+
+    next_idx = np.arange(np.sum(lengths)) + 1
+    next_idx[ends] = starts
+    has_next = np.ones(np.shape(next_idx), dtype=bool)
+    has_next[ends] = periodic
+
+    return next_idx, has_next
+
+
+def gait_limits(gait):
+    """Returns the explicit speed limits of a gait of a specification.
+
+    Args:
+        gait (dict): One entry of `spec["gaits"]`, with an optional `"limits"`
+            dict of `SPEC_LIMITS` keys.
+
+    Returns:
+        dict: The limits as keyword arguments of `validate_luts`, e.g.
+        {"max_velocity": 900}, empty if the gait has none.
+
+    Raises:
+        ValueError: If a limit is unknown.
+    """
+    limits = {}
+    for key, value in gait.get("limits", {}).items():
+        if key not in SPEC_LIMITS:
+            raise ValueError(gait["name"] + ": unknown limit " + key)
+        limits[SPEC_LIMITS[key]] = float(value)
+    return limits
+
+
+def validate_luts(
+    luts,
+    periodic=None,
+    servo_min=SERVO_MIN,
+    servo_max=SERVO_MAX,
+    delay_ms=DELAY_MS,
+    max_velocity=MAX_VELOCITY,
+    max_acceleration=MAX_ACCELERATION,
+    wrap_tolerance=WRAP_TOLERANCE,
+    overrides=None,
+):
+    """Validates the joint angles of many gaits at once.
+
+    All the gaits are concatenated into one array, so the cost is a handful
+    of vectorized passes regardless of the number of gaits. The checks are:
+        - nan: the IK has no solution.
+        - range: the servo ticks fall outside [servo_min, servo_max].
+        - velocity: the joint speed between two frames, `delay_ms` apart,
+          exceeds `max_velocity`.
+        - acceleration: the joint acceleration exceeds `max_acceleration`.
+        - wrap: the step from the last frame of a periodic gait back to its
+          first frame is larger than the largest step inside the gait by more
+          than `wrap_tolerance`.
+    For periodic gaits the velocity and acceleration include the wrap-around.
+
+    Args:
+        luts (dict): The joint angles in degrees keyed by gait name, each with
+            shape (steps, 6, 3).
+        periodic (dict, optional): Whether each gait loops, keyed by gait name.
+            Defaults to None, which means all the gaits loop.
+        servo_min (int, optional): The ticks at 0 deg. Defaults to SERVO_MIN.
+        servo_max (int, optional): The ticks at 180 deg. Defaults to SERVO_MAX.
+        delay_ms (float, optional): The frame period in ms. Defaults to DELAY_MS.
+        max_velocity (float, optional): The joint speed limit in deg/s.
+            Defaults to MAX_VELOCITY.
+        max_acceleration (float, optional): The joint acceleration limit in
+            deg/s^2. Defaults to MAX_ACCELERATION.
+        wrap_tolerance (float, optional): The allowed excess of the wrap-around
+            step in deg. Defaults to WRAP_TOLERANCE.
+        overrides (dict, optional): The "max_velocity" and/or
+            "max_acceleration" of single gaits, keyed by gait name, in place
+            of the limits above. Defaults to None.
+
+    Returns:
+        list: The `Issue`s found, empty if all the gaits are valid.
+    """
+    names = list(luts)
+    if not names:
+        return []
+
+    if periodic is None:
+        periodic = {}
+    lengths = np.array([np.shape(luts[name])[0] for name in names])
+    is_periodic = np.array([periodic.get(name, True) for name in names])
+
+    angles = np.concatenate([np.asarray(luts[name], dtype=float) for name in names])
+    gait_idx = np.repeat(np.arange(len(names)), lengths)
+    step_idx = np.arange(len(gait_idx)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+    next_idx, has_next = _next_frame(lengths, is_periodic)
+    is_wrap = (next_idx <= np.arange(len(next_idx))) & has_next
+
+    if overrides is None:
+        overrides = {}
+    velocity_limit = np.array(
+        [overrides.get(name, {}).get("max_velocity", max_velocity) for name in names]
+    )[gait_idx, np.newaxis, np.newaxis]
+    acceleration_limit = np.array(
+        [
+            overrides.get(name, {}).get("max_acceleration", max_acceleration)
+            for name in names
+        ]
+    )[gait_idx, np.newaxis, np.newaxis]
+
+    dt = delay_ms / 1000
+    flags = {}
+    values = {}
+
+    with np.errstate(invalid="ignore"):
+        flags["nan"] = np.isnan(angles)
+        values["nan"] = angles
+
+        ticks = angles / 180 * (servo_max - servo_min) + servo_min
+        flags["range"] = (np.round(ticks) < servo_min) | (np.round(ticks) > servo_max)
+        values["range"] = ticks
+
+        # velocity of frame i is from frame i to its next frame
+        step = angles[next_idx] - angles
+        velocity = step / dt
+        flags["velocity"] = (np.abs(velocity) > velocity_limit) & has_next[
+            :, np.newaxis, np.newaxis
+        ]
+        values["velocity"] = velocity
+
+        # acceleration at frame i, between the steps into and out of frame i
+        acceleration = np.empty(np.shape(velocity))
+        acceleration[next_idx] = (velocity[next_idx] - velocity) / dt
+        has_acceleration = np.empty(np.shape(has_next), dtype=bool)
+        has_acceleration[next_idx] = has_next & has_next[next_idx]
+        flags["acceleration"] = (np.abs(acceleration) > acceleration_limit) & (
+            has_acceleration[:, np.newaxis, np.newaxis]
+        )
+        values["acceleration"] = acceleration
+
+        # largest step inside every gait, for every joint
+        interior = np.where(is_wrap[:, np.newaxis, np.newaxis], 0, np.abs(step))
+        interior = np.maximum.reduceat(np.nan_to_num(interior), np.cumsum(lengths) - lengths)
+        flags["wrap"] = (
+            np.abs(step) > interior[gait_idx] + wrap_tolerance
+        ) & is_wrap[:, np.newaxis, np.newaxis]
+        values["wrap"] = step
+
+    issues = []
+    for check in CHECKS:
+        frame, leg, joint = np.nonzero(flags[check])
+        for frame_idx, leg_idx, joint_idx in zip(frame, leg, joint):
+            issues.append(
+                Issue(
+                    names[gait_idx[frame_idx]],
+                    check,
+                    int(step_idx[frame_idx]),
+                    int(leg_idx),
+                    int(joint_idx),
+                    float(values[check][frame_idx, leg_idx, joint_idx]),
+                )
+            )
+    return issues
+
+
+def format_issue(issue):
+    """Formats an issue as a single line of text.
+
+    Args:
+        issue (Issue): The issue.
+
+    Returns:
+        str: The description of the issue.
+    """
+    return "{}: {} at step {}, leg {}, joint {} ({:.6g})".format(
+        issue.gait, issue.check, issue.step, issue.leg, issue.joint, issue.value
+    )
@@ -26,6 +26,9 @@
 
 import numpy as np
 
+from hexapod_model import HexapodModel
+from transform import rotate_x, rotate_y, rotate_z, transform_points
+
 
 def semicircle_generator(radius, steps, reverse=False):
     """Generates a semicircle path with specified radius and steps.
@@ -115,6 +118,20 @@ def semicircle2_generator(steps, y_radius, z_radius, x_radius, reverse=False):
     return result
 
 
+def _homogeneous(rot):
+    """Embeds a 3x3 rotation matrix into a 4x4 homogeneous matrix.
+
+    Args:
+        rot (numpy.ndarray): A 3x3 rotation matrix.
+
+    Returns:
+        numpy.ndarray: A 4x4 homogeneous matrix without translation.
+    """
+    m = np.eye(4)
+    m[:3, :3] = rot
+    return m
+
+
 def get_rotate_x_matrix(angle):
     """Returns a 4x4 rotation matrix for rotation around the x-axis.
 
@@ -122,17 +139,9 @@ def get_rotate_x_matrix(angle):
         angle (float): The angle of rotation in degrees.
 
     Returns:
-        numpy.matrix: A 4x4 rotation matrix.
+        numpy.ndarray: A 4x4 homogeneous rotation matrix.
     """
-    angle = angle * np.pi / 180
-    return np.matrix(
-        [
-            [1, 0, 0, 0],
-            [0, np.cos(angle), -np.sin(angle), 0],
-            [0, np.sin(angle), np.cos(angle), 0],
-            [0, 0, 0, 1],
-        ]
-    )
+    return _homogeneous(rotate_x(angle))
 
 
 def get_rotate_y_matrix(angle):
@@ -142,17 +151,9 @@ def get_rotate_y_matrix(angle):
         angle (float): The angle of rotation in degrees.
 
     Returns:
-        numpy.matrix: A 4x4 rotation matrix.
+        numpy.ndarray: A 4x4 homogeneous rotation matrix.
     """
-    angle = angle * np.pi / 180
-    return np.matrix(
-        [
-            [np.cos(angle), 0, np.sin(angle), 0],
-            [0, 1, 0, 0],
-            [-np.sin(angle), 0, np.cos(angle), 0],
-            [0, 0, 0, 1],
-        ]
-    )
+    return _homogeneous(rotate_y(angle))
 
 
 def get_rotate_z_matrix(angle):
@@ -162,31 +163,23 @@ def get_rotate_z_matrix(angle):
         angle (float): The angle of rotation in degrees.
 
     Returns:
-        numpy.matrix: A 4x4 rotation matrix.
+        numpy.ndarray: A 4x4 homogeneous rotation matrix.
     """
-    angle = angle * np.pi / 180
-    return np.matrix(
-        [
-            [np.cos(angle), -np.sin(angle), 0, 0],
-            [np.sin(angle), np.cos(angle), 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1],
-        ]
-    )
+    return _homogeneous(rotate_z(angle))
 
 
 def matrix_mul(m, pt):
     """Multiplies a 4x4 matrix with a 3D point.
 
     Args:
-        m (numpy.matrix): A 4x4 matrix.
+        m (numpy.ndarray): A 4x4 matrix.
         pt (list): A 3D point represented as a list of three coordinates.
 
     Returns:
         list: The result of the matrix multiplication, represented as a list of three coordinates.
     """
-    ptx = list(pt) + [1]
-    return list((m * np.matrix(ptx).T).T.flat)[:-1]
+    m = np.asarray(m)
+    return list(m[:3, :3] @ np.asarray(pt, dtype=float) + m[:3, 3])
 
 
 def path_rotate_x(path, angle):
@@ -202,8 +195,7 @@ def path_rotate_x(path, angle):
     Returns:
         numpy.ndarray: The rotated path.
     """
-    ptx = np.append(path, np.ones((np.shape(path)[0], 1)), axis=1)
-    return ((get_rotate_x_matrix(angle) * np.matrix(ptx).T).T)[:, :-1]
+    return transform_points(path, rotate_x(angle))
 
 
 def path_rotate_y(path, angle):
@@ -219,8 +211,7 @@ def path_rotate_y(path, angle):
     Returns:
         numpy.ndarray: The rotated path.
     """
-    ptx = np.append(path, np.ones((np.shape(path)[0], 1)), axis=1)
-    return ((get_rotate_y_matrix(angle) * np.matrix(ptx).T).T)[:, :-1]
+    return transform_points(path, rotate_y(angle))
 
 
 def path_rotate_z(path, angle):
@@ -236,19 +227,24 @@ def path_rotate_z(path, angle):
     Returns:
         numpy.ndarray: The rotated path.
     """
-    ptx = np.append(path, np.ones((np.shape(path)[0], 1)), axis=1)
-    return ((get_rotate_z_matrix(angle) * np.matrix(ptx).T).T)[:, :-1]
+    return transform_points(path, rotate_z(angle))
 
 
 def inverse_kinematics(dest, config):
     """Calculates the joint angles for each leg of the hexapod to reach a desired destination.
 
+    The destination may carry any number of leading dimensions, so a whole gait
+    of shape (steps, 6, 3), or a stack of gaits, is solved in a single pass.
+
     Args:
-        dest (numpy.ndarray): A 3D array representing the desired destination coordinates
-            for each leg. The shape of the array is (6, 3), where:
+        dest (numpy.ndarray): An array representing the desired destination coordinates
+            for each leg. The shape of the array is (..., 6, 3), where:
+                - ... is any number of leading dimensions (e.g. steps).
                 - 6 is the number of legs.
                 - 3 is the number of coordinates (x, y, z).
-        config (dict): A dictionary containing the hexapod's configuration parameters.
+        config (dict or HexapodModel): A dictionary containing the hexapod's
+            configuration parameters, or a precompiled `HexapodModel`. Pass a
+            model when calling repeatedly to skip parsing the dictionary.
             The dictionary should contain the following keys:
                 - "legMountX": A list of x-coordinates for the leg mounts.
                 - "legMountY": A list of y-coordinates for the leg mounts.
@@ -260,51 +256,45 @@ def inverse_kinematics(dest, config):
                 - "legScale": A list of scaling factors for each leg's joint angles.
 
     Returns:
-        numpy.ndarray: A 3D array representing the joint angles for each leg.
-        The shape of the array is (6, 3), where:
+        numpy.ndarray: An array representing the joint angles for each leg.
+        The shape of the array is (..., 6, 3), where:
+            - ... matches the leading dimensions of `dest`.
             - 6 is the number of legs.
             - 3 is the number of joint angles (j1, j2, j3).
     """
-    mount_x = np.array(config["legMountX"])
-    mount_y = np.array(config["legMountY"])
-    root_j1 = config["legRootToJoint1"]
-    j1_j2 = config["legJoint1ToJoint2"]
-    j2_j3 = config["legJoint2ToJoint3"]
-    j3_tip = config["legJoint3ToTip"]
-    mount_angle = np.array(config["legMountAngle"]) / 180 * np.pi
-    mount_position = np.zeros((6, 3))
-    mount_position[:, 0] = mount_x
-    mount_position[:, 1] = mount_y
-    leg_scale = np.array(config["legScale"])
-
-    temp_dest = dest - mount_position
-    local_dest = np.zeros_like(dest)
-    local_dest[:, 0] = temp_dest[:, 0] * np.cos(mount_angle) + temp_dest[:, 1] * np.sin(
-        mount_angle
-    )
-    local_dest[:, 1] = temp_dest[:, 0] * np.sin(mount_angle) - temp_dest[:, 1] * np.cos(
-        mount_angle
-    )
-    local_dest[:, 2] = temp_dest[:, 2]
-
-    angles = np.zeros((6, 3))
-    x = local_dest[:, 0] - root_j1
-    y = local_dest[:, 1]
-
-    angles[:, 0] = -(np.arctan2(y, x) * 180 / np.pi) + 90
-
-    x = np.sqrt(x * x + y * y) - j1_j2
-    y = local_dest[:, 2]
-    ar = np.arctan2(y, x)
-    lr2 = x * x + y * y
-    lr = np.sqrt(lr2)
-    a1 = np.arccos((lr2 + j2_j3 * j2_j3 - j3_tip * j3_tip) / (2 * j2_j3 * lr))
-    a2 = np.arccos((lr2 - j2_j3 * j2_j3 + j3_tip * j3_tip) / (2 * j3_tip * lr))
-
-    angles[:, 1] = 90 - ((ar + a1) * 180 / np.pi) * leg_scale[:, 1]
-    angles[:, 2] = (90 - ((a1 + a2) * 180 / np.pi)) * leg_scale[:, 1] + 90
-
-    return angles
+    if not isinstance(config, HexapodModel):
+        config = HexapodModel(config)
+
+    return config.inverse_kinematics(dest)
+
+
+def forward_kinematics(angles, config, joints=False):
+    """Calculates the leg tip (or joint) positions from the joint angles.
+
+    Args:
+        angles (numpy.ndarray): An array representing the joint angles for each
+            leg in degrees. The shape of the array is (..., 6, 3), where:
+                - ... is any number of leading dimensions (e.g. steps).
+                - 6 is the number of legs.
+                - 3 is the number of joint angles (j1, j2, j3).
+            Use `hexapod_model.ticks_to_angles` to convert servo PWM ticks.
+        config (dict or HexapodModel): A dictionary containing the hexapod's
+            configuration parameters, or a precompiled `HexapodModel`.
+        joints (bool, optional): Whether to return the positions of all the
+            joints instead of only the leg tips. Defaults to False.
+
+    Returns:
+        numpy.ndarray: An array representing the coordinates in the body frame.
+        The shape of the array is (..., 6, 3) for the leg tips, or
+        (..., 6, 5, 3) for the leg root, joint 1, joint 2, joint 3 and the leg
+        tip of each leg.
+    """
+    if not isinstance(config, HexapodModel):
+        config = HexapodModel(config)
+
+    if joints:
+        return config.joint_positions(angles)
+    return config.forward_kinematics(angles)
 
 
 if __name__ == "__main__":
@@ -25,9 +25,10 @@
 
 import numpy as np
 
+from hexapod_model import HexapodModel
 from path_lib import semicircle_generator, semicircle2_generator
 from path_lib import path_rotate_z
-from path_lib import get_rotate_x_matrix, get_rotate_y_matrix, get_rotate_z_matrix
+from transform import rotate_x, rotate_y, rotate_z, transform_points
 
 
 def gen_walk_path(standby_coordinate, g_steps=28, g_radius=30, direction=0):
@@ -234,38 +235,31 @@ def gen_rotatex_path(standby_coordinate, g_steps=28, swing_angle=15, y_radius=15
     assert (g_steps % 4) == 0
     quarter = int(g_steps / 4)
 
-    path = np.zeros((g_steps, 6, 3))
-
     step_angle = swing_angle / quarter
     step_offset = y_radius / quarter
 
-    scx = np.append(standby_coordinate, np.ones((6, 1)), axis=1)
-
-    for i in range(quarter):
-        m = get_rotate_x_matrix(swing_angle - i * step_angle)
-        m[1, 3] = -i * step_offset
-
-        path[i, :, :] = ((np.matmul(m, scx.T)).T)[:, :-1]
-
-    for i in range(quarter):
-        m = get_rotate_x_matrix(-i * step_angle)
-        m[1, 3] = -y_radius + i * step_offset
-
-        path[i + quarter, :, :] = ((np.matmul(m, scx.T)).T)[:, :-1]
-
-    for i in range(quarter):
-        m = get_rotate_x_matrix(i * step_angle - swing_angle)
-        m[1, 3] = i * step_offset
-
-        path[i + quarter * 2, :, :] = ((np.matmul(m, scx.T)).T)[:, :-1]
+    i = np.arange(quarter)
 
-    for i in range(quarter):
-        m = get_rotate_x_matrix(i * step_angle)
-        m[1, 3] = y_radius - i * step_offset
-
-        path[i + quarter * 3, :, :] = ((np.matmul(m, scx.T)).T)[:, :-1]
+    # swing back and forth around the x-axis while shifting along the y-axis
+    angle = np.concatenate(
+        (
+            swing_angle - i * step_angle,
+            -i * step_angle,
+            i * step_angle - swing_angle,
+            i * step_angle,
+        )
+    )
+    offset = np.zeros((g_steps, 3))
+    offset[:, 1] = np.concatenate(
+        (
+            -i * step_offset,
+            -y_radius + i * step_offset,
+            i * step_offset,
+            y_radius - i * step_offset,
+        )
+    )
 
-    return path
+    return transform_points(standby_coordinate, rotate_x(angle), offset)
 
 
 def gen_rotatey_path(standby_coordinate, g_steps=28, swing_angle=15, x_radius=15):
@@ -290,38 +284,31 @@ def gen_rotatey_path(standby_coordinate, g_steps=28, swing_angle=15, x_radius=15
     assert (g_steps % 4) == 0
     quarter = int(g_steps / 4)
 
-    path = np.zeros((g_steps, 6, 3))
-
     step_angle = swing_angle / quarter
     step_offset = x_radius / quarter
 
-    scx = np.append(standby_coordinate, np.ones((6, 1)), axis=1)
-
-    for i in range(quarter):
-        m = get_rotate_y_matrix(swing_angle - i * step_angle)
-        m[1, 3] = -i * step_offset
+    i = np.arange(quarter)
 
-        path[i, :, :] = ((np.matmul(m, scx.T)).T)[:, :-1]
-
-    for i in range(quarter):
-        m = get_rotate_y_matrix(-i * step_angle)
-        m[1, 3] = -x_radius + i * step_offset
-
-        path[i + quarter, :, :] = ((np.matmul(m, scx.T)).T)[:, :-1]
-
-    for i in range(quarter):
-        m = get_rotate_y_matrix(i * step_angle - swing_angle)
-        m[1, 3] = i * step_offset
-
-        path[i + quarter * 2, :, :] = ((np.matmul(m, scx.T)).T)[:, :-1]
-
-    for i in range(quarter):
-        m = get_rotate_y_matrix(i * step_angle)
-        m[1, 3] = x_radius - i * step_offset
-
-        path[i + quarter * 3, :, :] = ((np.matmul(m, scx.T)).T)[:, :-1]
+    # swing back and forth around the y-axis while shifting along the y-axis
+    angle = np.concatenate(
+        (
+            swing_angle - i * step_angle,
+            -i * step_angle,
+            i * step_angle - swing_angle,
+            i * step_angle,
+        )
+    )
+    offset = np.zeros((g_steps, 3))
+    offset[:, 1] = np.concatenate(
+        (
+            -i * step_offset,
+            -x_radius + i * step_offset,
+            i * step_offset,
+            x_radius - i * step_offset,
+        )
+    )
 
-    return path
+    return transform_points(standby_coordinate, rotate_y(angle), offset)
 
 
 def gen_rotatez_path(standby_coordinate, g_steps=28, z_lift=4.5, xy_radius=1):
@@ -345,22 +332,17 @@ def gen_rotatez_path(standby_coordinate, g_steps=28, z_lift=4.5, xy_radius=1):
     """
     assert (g_steps % 4) == 0
 
-    path = np.zeros((g_steps, 6, 3))
-
     step_angle = 2 * np.pi / g_steps
-    scx = np.append(standby_coordinate, np.ones((6, 1)), axis=1)
+    i = np.arange(g_steps)
 
-    for i in range(g_steps):
-        x = xy_radius * np.cos(i * step_angle)
-        y = xy_radius * np.sin(i * step_angle)
+    x = xy_radius * np.cos(i * step_angle)
+    y = xy_radius * np.sin(i * step_angle)
 
-        m = get_rotate_y_matrix(
-            np.arctan2(x, z_lift) * 180 / np.pi
-        ) * get_rotate_x_matrix(np.arctan2(y, z_lift) * 180 / np.pi)
-
-        path[i, :, :] = ((np.matmul(m, scx.T)).T)[:, :-1]
+    m = rotate_y(np.arctan2(x, z_lift) * 180 / np.pi) @ rotate_x(
+        np.arctan2(y, z_lift) * 180 / np.pi
+    )
 
-    return path
+    return transform_points(standby_coordinate, m)
 
 
 def gen_twist_path(
@@ -390,58 +372,30 @@ def gen_twist_path(
     quarter = int(g_steps / 4)
     step_x_angle = twist_x_angle / quarter
     step_y_angle = twise_y_angle / quarter
-    scx = np.append(standby_coordinate, np.ones((6, 1)), axis=1)
 
-    m = get_rotate_x_matrix(raise_angle)
+    i = np.arange(quarter)
 
-    path = np.zeros((g_steps, 6, 3))
+    z_angle = np.concatenate((i, quarter - i, -i, -quarter + i)) * step_x_angle
+    x_angle = np.concatenate((i, quarter - i, i, quarter - i)) * step_y_angle
 
-    for i in range(quarter):
-        temp = (
-            m
-            * get_rotate_z_matrix(i * step_x_angle)
-            * get_rotate_x_matrix(i * step_y_angle)
-        )
-
-        path[i, :, :] = ((np.matmul(temp, scx.T)).T)[:, :-1]
-
-    for i in range(quarter):
-        temp = (
-            m
-            * get_rotate_z_matrix((quarter - i) * step_x_angle)
-            * get_rotate_x_matrix((quarter - i) * step_y_angle)
-        )
+    m = rotate_x(raise_angle) @ rotate_z(z_angle) @ rotate_x(x_angle)
 
-        path[i + quarter * 1, :, :] = ((np.matmul(temp, scx.T)).T)[:, :-1]
+    return transform_points(standby_coordinate, m)
 
-    for i in range(quarter):
-        temp = (
-            m
-            * get_rotate_z_matrix(-i * step_x_angle)
-            * get_rotate_x_matrix(i * step_y_angle)
-        )
-
-        path[i + quarter * 2, :, :] = ((np.matmul(temp, scx.T)).T)[:, :-1]
-
-    for i in range(quarter):
-        temp = (
-            m
-            * get_rotate_z_matrix((-quarter + i) * step_x_angle)
-            * get_rotate_x_matrix((quarter - i) * step_y_angle)
-        )
 
-        path[i + quarter * 3, :, :] = ((np.matmul(temp, scx.T)).T)[:, :-1]
-
-    return path
-
-
-def gen_standup_path(standby_coordinate, laydown_coordinate, steps=28):
+def gen_standup_path(standby_coordinate, laydown_coordinate, steps=28, lift_up_size=10):
     """Generates a path for the hexapod to stand up from a lying down position.
 
+    The body is first lifted to the standby height, then the legs are moved back
+    to the standby posture, one tripod after the other. The input coordinates are
+    not modified.
+
     Args:
         standby_coordinate (numpy.ndarray): The standby coordinate of the hexapod.
         laydown_coordinate (numpy.ndarray): The coordinate of the hexapod when lying down.
         steps (int, optional): The number of steps in the path. Defaults to 28.
+        lift_up_size (int, optional): The number of steps used to lift the body.
+            Defaults to 10.
 
     Returns:
         numpy.ndarray: A 3D array representing the standup path.
@@ -449,70 +403,47 @@ def gen_standup_path(standby_coordinate, laydown_coordinate, steps=28):
             - steps is the number of steps in the path.
             - 6 is the number of legs.
             - 3 is the number of coordinates (x, y, z).
+
+    Raises:
+        AssertionError: If steps is less than lift_up_size + 2.
     """
-    standing_up_lut_size = steps
+    assert steps >= lift_up_size + 2
+    adjust_leg_size = int((steps - lift_up_size) / 2)
 
-    lift_up_size = 10
-    adjust_leg_size = int((standing_up_lut_size - lift_up_size) / 2)
+    lut_standup = np.empty((steps, 6, 3))
 
-    lift_up_linspace = np.linspace(
+    lut_standup[:lift_up_size, :, :] = laydown_coordinate
+    lut_standup[:lift_up_size, :, 2] = np.linspace(
         laydown_coordinate[0, 2], standby_coordinate[0, 2], lift_up_size
-    )
+    )[:, np.newaxis]
+    lifted = lut_standup[lift_up_size - 1, :, :]
 
-    lut_standup = np.zeros((standing_up_lut_size, 6, 3))
-
-    for idx, var in enumerate(lift_up_linspace):
-        laydown_coordinate[:, 2] = var
-        lut_standup[idx, :, :] = laydown_coordinate
-
-    radius = (lut_standup[lift_up_size - 1, 1, 0] - standby_coordinate[1, 0]) / 2
+    radius = (lifted[1, 0] - standby_coordinate[1, 0]) / 2
 
     step_angle = np.pi / adjust_leg_size
     angle = np.arange(1, adjust_leg_size + 1) * step_angle
 
-    z_offset = radius * np.sin(angle)
-    x_offset = radius * np.cos(angle) - radius
-
     r_leg2_offset = np.zeros((adjust_leg_size, 3))
-    r_leg2_offset[:, 0] = x_offset
-    r_leg2_offset[:, 2] = z_offset
+    r_leg2_offset[:, 0] = radius * np.cos(angle) - radius
+    r_leg2_offset[:, 2] = radius * np.sin(angle)
 
-    r_leg1_offset = path_rotate_z(r_leg2_offset, 45)
-    r_leg3_offset = path_rotate_z(r_leg2_offset, -45)
+    # (adjust_leg_size, 6, 3) offsets, rotated to each leg's outward direction
+    leg_offset = np.swapaxes(
+        transform_points(r_leg2_offset, rotate_z([45, 0, -45, 135, 180, -135])), 0, 1
+    )
 
-    l_leg1_offset = path_rotate_z(r_leg2_offset, 135)
-    l_leg2_offset = path_rotate_z(r_leg2_offset, 180)
-    l_leg3_offset = path_rotate_z(r_leg2_offset, -135)
+    first_tripod = [1, 3, 5]
+    second_tripod = [0, 2, 4]
 
-    for idx in range(0, adjust_leg_size):
-        lut_standup[idx + lift_up_size, :, :] = lut_standup[lift_up_size - 1, :, :]
-        lut_standup[idx + lift_up_size, 3, :] = (
-            lut_standup[idx + lift_up_size, 3, :] + l_leg1_offset[idx, :]
-        )
-        lut_standup[idx + lift_up_size, 1, :] = (
-            lut_standup[idx + lift_up_size, 1, :] + r_leg2_offset[idx, :]
-        )
-        lut_standup[idx + lift_up_size, 5, :] = (
-            lut_standup[idx + lift_up_size, 5, :] + l_leg3_offset[idx, :]
-        )
+    first_end = lift_up_size + adjust_leg_size
+    second_end = first_end + adjust_leg_size
 
-    for idx in range(0, adjust_leg_size):
-        lut_standup[idx + lift_up_size + adjust_leg_size, :, :] = lut_standup[
-            lift_up_size + adjust_leg_size - 1, :, :
-        ]
-
-        lut_standup[idx + lift_up_size + adjust_leg_size, 0, :] = (
-            lut_standup[idx + lift_up_size + adjust_leg_size, 0, :]
-            + r_leg1_offset[idx, :]
-        )
-        lut_standup[idx + lift_up_size + adjust_leg_size, 4, :] = (
-            lut_standup[idx + lift_up_size + adjust_leg_size, 4, :]
-            + l_leg2_offset[idx, :]
-        )
-        lut_standup[idx + lift_up_size + adjust_leg_size, 2, :] = (
-            lut_standup[idx + lift_up_size + adjust_leg_size, 2, :]
-            + r_leg3_offset[idx, :]
-        )
+    # legs that finished their move hold the final offset until the end
+    lut_standup[lift_up_size:] = lifted
+    lut_standup[lift_up_size:first_end, first_tripod] += leg_offset[:, first_tripod]
+    lut_standup[first_end:, first_tripod] += leg_offset[-1, first_tripod]
+    lut_standup[first_end:second_end, second_tripod] += leg_offset[:, second_tripod]
+    lut_standup[second_end:, second_tripod] += leg_offset[-1, second_tripod]
 
     return lut_standup
 
@@ -523,7 +454,8 @@ def gen_posture(j2_angle, j3_angle, config):
     Args:
         j2_angle (float): The angle of joint 2 in degrees.
         j3_angle (float): The angle of joint 3 in degrees.
-        config (dict): A dictionary containing the hexapod's configuration parameters.
+        config (dict or HexapodModel): A dictionary containing the hexapod's
+            configuration parameters, or a precompiled `HexapodModel`.
             The dictionary should contain the following keys:
                 - "legMountX": A list of x-coordinates for the leg mounts.
                 - "legMountY": A list of y-coordinates for the leg mounts.
@@ -539,23 +471,13 @@ def gen_posture(j2_angle, j3_angle, config):
             - 6 is the number of legs.
             - 3 is the number of coordinates (x, y, z).
     """
-    mount_x = np.array(config["legMountX"])
-    mount_y = np.array(config["legMountY"])
-    root_j1 = config["legRootToJoint1"]
-    j1_j2 = config["legJoint1ToJoint2"]
-    j2_j3 = config["legJoint2ToJoint3"]
-    j3_tip = config["legJoint3ToTip"]
-    mount_angle = np.array(config["legMountAngle"]) / 180 * np.pi
-
-    j2_rad = j2_angle / 180 * np.pi
-    j3_rad = j3_angle / 180 * np.pi
-    posture = np.zeros((6, 3))
-
-    posture[:, 0] = mount_x + (
-        root_j1 + j1_j2 + (j2_j3 * np.sin(j2_rad)) + j3_tip * np.cos(j3_rad)
-    ) * np.cos(mount_angle)
-    posture[:, 1] = mount_y + (
-        root_j1 + j1_j2 + (j2_j3 * np.sin(j2_rad)) + j3_tip * np.cos(j3_rad)
-    ) * np.sin(mount_angle)
-    posture[:, 2] = j2_j3 * np.cos(j2_rad) - j3_tip * np.sin(j3_rad)
-    return posture
+    if not isinstance(config, HexapodModel):
+        config = HexapodModel(config)
+
+    return config.gen_posture(j2_angle, j3_angle)
+
+
+if __name__ == "__main__":
+    from lut_compiler import main
+
+    main()
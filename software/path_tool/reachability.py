@@ -0,0 +1,251 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import numpy as np
+
+
+def joint_limits_ok(angles, lower=0, upper=180):
+    """Checks the joint angles against the servo range.
+
+    Args:
+        angles (numpy.ndarray): The joint angles in degrees, with shape (..., 3).
+        lower (float, optional): The lowest joint angle. Defaults to 0.
+        upper (float, optional): The highest joint angle. Defaults to 180.
+
+    Returns:
+        numpy.ndarray: True where all the 3 joint angles are valid, with shape (...).
+    """
+    with np.errstate(invalid="ignore"):
+        return np.all((angles >= lower) & (angles <= upper), axis=-1)
+
+
+def reachable(model, dest, lower=0, upper=180):
+    """Checks exactly whether the leg tips can reach the destinations.
+
+    A destination is reachable when the IK has a solution (no NaN) and the
+    joint angles lie within the servo range.
+
+    Args:
+        model (HexapodModel): The compiled hexapod model.
+        dest (numpy.ndarray): The leg tip destinations, with shape (..., 6, 3).
+        lower (float, optional): The lowest joint angle. Defaults to 0.
+        upper (float, optional): The highest joint angle. Defaults to 180.
+
+    Returns:
+        numpy.ndarray: True for the reachable destinations, with shape (..., 6).
+    """
+    with np.errstate(invalid="ignore"):
+        angles = model.inverse_kinematics(dest)
+    return joint_limits_ok(angles, lower, upper)
+
+
+def ik_jacobian(model, angles, legs=None):
+    """Calculates the analytic Jacobian of the leg tips to the joint angles.
+
+    Args:
+        model (HexapodModel): The compiled hexapod model.
+        angles (numpy.ndarray): The joint angles in degrees, with shape (..., 6, 3).
+        legs (list, optional): The indices of the legs the second to last axis
+            of `angles` refers to, as in `HexapodModel.inverse_kinematics`.
+            Defaults to None, which means all the 6 legs in order.
+
+    Returns:
+        numpy.ndarray: The Jacobians, with shape (..., 6, 3, 3), where
+        `jacobian[..., leg, i, j]` is the derivative of the tip coordinate `i`
+        to the joint angle `j`, in mm per radian.
+    """
+    angles = np.asarray(angles, dtype=float)
+
+    if legs is None:
+        legs = slice(None)
+
+    scale = model.joint_scale[legs]
+
+    # same parametrization as `HexapodModel.forward_kinematics`
+    heading = (90 - angles[..., 0]) / 180 * np.pi
+    femur = (90 - angles[..., 1]) * scale / 180 * np.pi
+    knee = (90 - (angles[..., 2] - 90) * scale) / 180 * np.pi
+    tibia = femur - knee
+
+    femur_x = model.j2_j3 * np.cos(femur)
+    femur_z = model.j2_j3 * np.sin(femur)
+    tibia_x = model.j3_tip * np.cos(tibia)
+    tibia_z = model.j3_tip * np.sin(tibia)
+    reach = model.j1_j2 + femur_x + tibia_x
+
+    cos_heading = np.cos(heading)
+    sin_heading = np.sin(heading)
+
+    # derivatives in the leg frame, (..., 6, 3 coordinates, 3 joints)
+    local = np.zeros(angles.shape + (3,))
+
+    # j1 turns the leg plane, d(heading)/d(j1) = -1
+    local[..., 0, 0] = reach * sin_heading
+    local[..., 1, 0] = -reach * cos_heading
+
+    # j2 turns both links, d(femur)/d(j2) = d(tibia)/d(j2) = -scale
+    d_reach = scale * (femur_z + tibia_z)
+    local[..., 0, 1] = d_reach * cos_heading
+    local[..., 1, 1] = d_reach * sin_heading
+    local[..., 2, 1] = -scale * (femur_x + tibia_x)
+
+    # j3 turns the tibia only, d(tibia)/d(j3) = scale
+    d_reach = -scale * tibia_z
+    local[..., 0, 2] = d_reach * cos_heading
+    local[..., 1, 2] = d_reach * sin_heading
+    local[..., 2, 2] = scale * tibia_x
+
+    # leg frame to body frame
+    jacobian = np.empty(local.shape)
+    cos_mount = model.cos_mount[legs, np.newaxis]
+    sin_mount = model.sin_mount[legs, np.newaxis]
+    jacobian[..., 0, :] = local[..., 0, :] * cos_mount + local[..., 1, :] * sin_mount
+    jacobian[..., 1, :] = local[..., 0, :] * sin_mount - local[..., 1, :] * cos_mount
+    jacobian[..., 2, :] = local[..., 2, :]
+
+    return jacobian
+
+
+def manipulability(jacobian):
+    """Calculates the Yoshikawa manipulability of the legs.
+
+    It is zero at singular configurations, e.g. a fully stretched leg, and
+    grows with the volume of the velocity ellipsoid of the leg tip.
+
+    Args:
+        jacobian (numpy.ndarray): The Jacobians from `ik_jacobian`, with shape
+            (..., 3, 3).
+
+    Returns:
+        numpy.ndarray: sqrt(det(J J^T)), in mm^3 per radian^3, with shape (...).
+    """
+    # J is square, so sqrt(det(J J^T)) = |det(J)|
+    return np.abs(np.linalg.det(jacobian))
+
+
+class ReachabilityGrid:
+    """Voxelized reachable workspace of every leg.
+
+    The grid is precomputed once from the model with a single IK pass over
+    the voxel centers, so any candidate path can be screened with one array
+    lookup per point instead of a full IK solve and NaN scan. Points are
+    classified by the voxel they fall in, so the answer is only exact up to
+    the voxel size close to the workspace boundary; use `reachable` for the
+    exact check.
+
+    Args:
+        model (HexapodModel): The compiled hexapod model.
+        voxel_size (float, optional): The edge length of a voxel in mm.
+            Defaults to 5.
+        min_manipulability (float, optional): Voxels whose manipulability is
+            not above this value are marked unreachable, to keep away from
+            singular configurations. Defaults to 0.
+    """
+
+    def __init__(self, model, voxel_size=5.0, min_manipulability=0.0):
+        self.model = model
+        self.voxel_size = float(voxel_size)
+        self.min_manipulability = min_manipulability
+
+        # bounding box of every leg, centered on the leg root
+        leg_length = model.root_j1 + model.j1_j2 + model.j2_j3 + model.j3_tip
+        half_size = np.array([leg_length, leg_length, model.j2_j3 + model.j3_tip])
+        self.shape = tuple(
+            int(dim) for dim in np.ceil(2 * half_size / self.voxel_size)
+        )
+
+        mount = np.stack(
+            (model.mount_x, model.mount_y, np.zeros_like(model.mount_x)), axis=-1
+        )
+        self.origin = mount - half_size
+
+        # voxel centers relative to the origin, (nx, ny, nz, 3)
+        centers = (
+            np.stack(
+                np.meshgrid(*[np.arange(dim) for dim in self.shape], indexing="ij"),
+                axis=-1,
+            )
+            + 0.5
+        ) * self.voxel_size
+
+        self.grid = np.empty((6,) + self.shape, dtype=bool)
+        for leg_idx in range(6):
+            dest = centers + self.origin[leg_idx]
+            # solve the z-axis of the grid as the leg axis, all for this leg
+            legs = [leg_idx] * self.shape[2]
+
+            with np.errstate(invalid="ignore"):
+                angles = model.inverse_kinematics(dest, legs=legs)
+
+                reach_ok = joint_limits_ok(angles)
+                if min_manipulability > 0:
+                    reach_ok &= (
+                        manipulability(ik_jacobian(model, angles, legs=legs))
+                        > min_manipulability
+                    )
+            self.grid[leg_idx] = reach_ok
+
+    def voxel_index(self, points):
+        """Returns the voxel indices of points in the grid of their leg.
+
+        Args:
+            points (numpy.ndarray): The leg tip positions, with shape (..., 6, 3).
+
+        Returns:
+            tuple: (index, inside), where `index` is the integer voxel index with
+            shape (..., 6, 3), and `inside` is True for the points that fall
+            inside the grid, with shape (..., 6).
+        """
+        index = np.floor((np.asarray(points) - self.origin) / self.voxel_size).astype(
+            int
+        )
+        inside = np.all((index >= 0) & (index < self.shape), axis=-1)
+        return index, inside
+
+    def contains(self, points):
+        """Checks whether the leg tips fall in reachable voxels.
+
+        Args:
+            points (numpy.ndarray): The leg tip positions, with shape (..., 6, 3).
+
+        Returns:
+            numpy.ndarray: True for the reachable points, with shape (..., 6).
+        """
+        index, inside = self.voxel_index(points)
+        index = np.where(inside[..., np.newaxis], index, 0)
+
+        legs = np.broadcast_to(np.arange(6), inside.shape)
+        return inside & self.grid[legs, index[..., 0], index[..., 1], index[..., 2]]
+
+    def check_path(self, path):
+        """Checks whether every point of a path falls in a reachable voxel.
+
+        Args:
+            path (numpy.ndarray): The path, with shape (steps, 6, 3).
+
+        Returns:
+            bool: True if all the points are reachable.
+        """
+        return bool(np.all(self.contains(path)))
@@ -0,0 +1,121 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import numpy as np
+
+
+def periodic_spline_moments(values, axis=0):
+    """Solves the second derivatives of a periodic cubic spline.
+
+    The samples are assumed uniformly spaced with a unit step. The periodic
+    spline leads to the circulant system
+    `M[i-1] + 4 M[i] + M[i+1] = 6 (y[i-1] - 2 y[i] + y[i+1])`,
+    which is diagonalized by the FFT, so all the curves along the other axes
+    are solved at once in O(n log n).
+
+    Args:
+        values (numpy.ndarray): The samples, with any shape.
+        axis (int, optional): The axis of the samples. Defaults to 0.
+
+    Returns:
+        numpy.ndarray: The second derivatives at the samples, with the same
+        shape as `values`.
+    """
+    values = np.moveaxis(np.asarray(values, dtype=float), axis, 0)
+    steps = np.shape(values)[0]
+
+    rhs = 6 * (np.roll(values, 1, axis=0) - 2 * values + np.roll(values, -1, axis=0))
+    eigen = 4 + 2 * np.cos(2 * np.pi * np.arange(steps) / steps)
+    eigen = np.reshape(eigen, (steps,) + (1,) * (values.ndim - 1))
+
+    moments = np.real(np.fft.ifft(np.fft.fft(rhs, axis=0) / eigen, axis=0))
+    return np.moveaxis(moments, 0, axis)
+
+
+def resample_periodic(values, steps, axis=0):
+    """Resamples periodic curves to another number of samples.
+
+    The curves are interpolated with periodic cubic splines, which pass
+    through the original samples and are smooth across the loop wrap-around.
+
+    Args:
+        values (numpy.ndarray): The samples, with any shape, e.g. a path with
+            shape (steps, 6, 3) or joint angles.
+        steps (int): The new number of samples.
+        axis (int, optional): The axis of the samples. Defaults to 0.
+
+    Returns:
+        numpy.ndarray: The resampled curves, with `steps` samples along `axis`.
+    """
+    values = np.moveaxis(np.asarray(values, dtype=float), axis, 0)
+    moments = periodic_spline_moments(values)
+    src_steps = np.shape(values)[0]
+
+    pos = np.arange(steps) * src_steps / steps
+    idx = np.floor(pos).astype(int) % src_steps
+    next_idx = (idx + 1) % src_steps
+    t = np.reshape(pos - np.floor(pos), (steps,) + (1,) * (values.ndim - 1))
+    s = 1 - t
+
+    result = (
+        s * values[idx]
+        + t * values[next_idx]
+        + ((s**3 - s) * moments[idx] + (t**3 - t) * moments[next_idx]) / 6
+    )
+    return np.moveaxis(result, 0, axis)
+
+
+def resample_path(path, steps, model=None, space="cartesian"):
+    """Resamples a gait to another number of steps.
+
+    Fewer steps give a smaller LUT and a faster gait at the same frame
+    period, more steps a slower and smoother one.
+
+    Args:
+        path (numpy.ndarray): The path, with shape (..., src_steps, 6, 3).
+        steps (int): The new number of steps.
+        model (HexapodModel, optional): The compiled hexapod model, required
+            for the "joint" space. Defaults to None.
+        space (str, optional): "cartesian" to interpolate the leg tip
+            positions, or "joint" to interpolate the joint angles after the
+            IK. Defaults to "cartesian".
+
+    Returns:
+        numpy.ndarray: The resampled leg tip path for the "cartesian" space, or
+        the resampled joint angles for the "joint" space, with shape
+        (..., steps, 6, 3).
+
+    Raises:
+        ValueError: If the space is unknown, or the "joint" space has no model.
+    """
+    if space == "cartesian":
+        return resample_periodic(path, steps, axis=-3)
+
+    if space == "joint":
+        if model is None:
+            raise ValueError("joint space resampling needs a HexapodModel")
+        return resample_periodic(model.inverse_kinematics(path), steps, axis=-3)
+
+    raise ValueError("unknown resampling space: " + str(space))
@@ -0,0 +1,387 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import re
+
+import numpy as np
+
+from hexapod_model import ticks_to_angles
+from header_parser import COMMENT_RE, parse_arrays
+
+DEFINE_RE = re.compile(r"#define\s+(\w+)\s+(-?\d+)")
+
+# text commands of the firmware and the LUT they play, as in `setup()` of
+# `hexapod_arduino.ino`
+COMMAND_LUTS = {
+    "standby": "lut_standby",
+    "walk0": "lut_walk_0",
+    "walk180": "lut_walk_180",
+    "walkr45": "lut_walk_r45",
+    "walkr90": "lut_walk_r90",
+    "walkr135": "lut_walk_r135",
+    "walkl45": "lut_walk_l45",
+    "walkl90": "lut_walk_l90",
+    "walkl135": "lut_walk_l135",
+    "fastforward": "lut_fast_forward",
+    "fastbackward": "lut_fast_backward",
+    "turnleft": "lut_turn_left",
+    "turnright": "lut_turn_right",
+    "climbforward": "lut_climb_forward",
+    "climbbackward": "lut_climb_backward",
+    "rotatex": "lut_rotate_x",
+    "rotatey": "lut_rotate_y",
+    "rotatez": "lut_rotate_z",
+    "twist": "lut_twist",
+}
+
+STANDBY_LUT = "lut_standby"
+
+# ticks per step of `exec_transition`
+TRANSITION_TICK_STEP = 6
+
+# number of channels of a PCA9685 driver
+DRIVER_CHANNELS = 16
+
+# tolerance of the ground contact detection, in mm
+CONTACT_TOLERANCE = 0.5
+
+
+def load_firmware_config(filename):
+    """Reads the servo range, frame period and servo wiring from `config.h`.
+
+    Args:
+        filename (str): Path to the firmware's `config.h`.
+
+    Returns:
+        dict: With the keys "servo_min", "servo_mid", "servo_max", "delay_ms",
+        and the (3, 3) int arrays "left_legs", "right_legs",
+        "left_offset_ticks" and "right_offset_ticks".
+    """
+    with open(filename, "r", encoding="utf-8") as read_file:
+        text = read_file.read()
+
+    defines = {
+        name: int(value) for name, value in DEFINE_RE.findall(COMMENT_RE.sub("", text))
+    }
+    arrays = parse_arrays(text)
+
+    return {
+        "servo_min": defines["SERVOMIN"],
+        "servo_mid": defines["SERVOMID"],
+        "servo_max": defines["SERVOMAX"],
+        "delay_ms": defines["DELAY_MS"],
+        "left_legs": arrays["left_legs"].astype(int),
+        "right_legs": arrays["right_legs"].astype(int),
+        "left_offset_ticks": arrays["left_offset_ticks"].astype(int),
+        "right_offset_ticks": arrays["right_offset_ticks"].astype(int),
+    }
+
+
+def transition_frames(start, end, tick_step=TRANSITION_TICK_STEP):
+    """Generates the frames of `exec_transition` in the firmware.
+
+    Every joint moves `tick_step` ticks per frame towards its end position
+    and snaps to it once within `tick_step`. Like the firmware, the number
+    of frames is the largest difference divided by `tick_step`, rounded down,
+    so the slowest joint may stop short of its end position.
+
+    Args:
+        start (numpy.ndarray): The start ticks, with shape (6, 3).
+        end (numpy.ndarray): The end ticks, with shape (6, 3).
+        tick_step (int, optional): The ticks per frame.
+            Defaults to TRANSITION_TICK_STEP.
+
+    Returns:
+        numpy.ndarray: The ticks of the frames, with shape (frames, 6, 3).
+    """
+    start = np.asarray(start, dtype=int)
+    diff = np.asarray(end, dtype=int) - start
+    frames = int(np.max(np.abs(diff))) // tick_step
+
+    moved = np.minimum(
+        tick_step * np.arange(1, frames + 1)[:, np.newaxis, np.newaxis], np.abs(diff)
+    )
+    return start + np.where(diff < 0, -1, 1) * moved
+
+
+class FirmwareSimulator:
+    """Headless simulator of the motion loop of the firmware.
+
+    Sequences of motion commands are expanded to the exact frames that
+    `exec_motion` and `exec_transition` in `hexapod_arduino.ino` write to
+    the servos, including the standby transitions when a motion starts or
+    is interrupted. The whole episode then goes through the servo wiring and
+    a single batched FK, so it runs much faster than real time.
+
+    Args:
+        model (HexapodModel): The compiled hexapod model.
+        luts (dict): The servo ticks keyed by LUT name, e.g. from
+            `header_parser.load_motion_header`.
+        firmware (dict): The firmware configuration from `load_firmware_config`.
+        write_ms (float, optional): The time spent writing one frame to the
+            servo drivers, added to every frame. Defaults to 0.
+    """
+
+    def __init__(self, model, luts, firmware, write_ms=0.0):
+        self.model = model
+        self.luts = {name: np.asarray(lut, dtype=int) for name, lut in luts.items()}
+        self.firmware = firmware
+        self.write_ms = write_ms
+
+    def schedule(self, commands):
+        """Expands motion commands to the frames the firmware plays.
+
+        Each command runs its LUT `cycles` times in full, as `loop()` calling
+        `exec_motion` repeatedly. The next command then arrives, which the
+        firmware notices at the first frame of the next pass, and it moves to
+        the standby posture before starting the new LUT. A motion started
+        from standby begins with a transition from the standby posture.
+
+        Args:
+            commands (list): (command, cycles) pairs, where `command` is a key
+                of `COMMAND_LUTS` or a LUT name.
+
+        Returns:
+            dict: With the keys:
+                - "ticks": the LUT ticks of every frame, with shape (frames, 6, 3).
+                - "duration_ms": the time until the next frame, with shape (frames,).
+                - "command": the index of the command of every frame.
+                - "lut_index": the LUT frame index, -1 for transition frames.
+        """
+        delay_ms = self.firmware["delay_ms"]
+        standby = self.luts[STANDBY_LUT][0]
+
+        ticks = []
+        duration = []
+        command_idx = []
+        lut_index = []
+
+        def emit(frames, delays, cmd_idx, indices):
+            ticks.append(frames)
+            duration.append(delays)
+            command_idx.append(np.full(len(frames), cmd_idx))
+            lut_index.append(np.broadcast_to(indices, (len(frames),)))
+
+        current_standby = True
+        for cmd_idx, (command, cycles) in enumerate(commands):
+            lut = self.luts[COMMAND_LUTS.get(command, command)]
+            steps = np.shape(lut)[0]
+            is_standby = COMMAND_LUTS.get(command, command) == STANDBY_LUT
+
+            for _ in range(cycles):
+                if current_standby:
+                    frames = transition_frames(standby, lut[0])
+                    emit(frames, np.zeros(len(frames)), cmd_idx, -1)
+                current_standby = is_standby
+
+                emit(lut, np.full(steps, float(delay_ms)), cmd_idx, np.arange(steps))
+
+            # the next command interrupts the next pass at its first frame,
+            # which is followed by a transition to standby and one delay
+            if cmd_idx + 1 < len(commands) and cycles > 0 and steps // 2 > 0:
+                frames = np.concatenate(
+                    (lut[:1], transition_frames(lut[0], standby))
+                )
+                delays = np.zeros(len(frames))
+                delays[-1] = delay_ms
+                indices = np.full(len(frames), -1)
+                indices[0] = 0
+                emit(frames, delays, cmd_idx, indices)
+
+        if not ticks:
+            empty = np.zeros(0, dtype=int)
+            return {
+                "ticks": np.zeros((0, 6, 3), dtype=int),
+                "duration_ms": np.zeros(0),
+                "command": empty,
+                "lut_index": empty,
+            }
+
+        return {
+            "ticks": np.concatenate(ticks).astype(int),
+            "duration_ms": np.concatenate(duration) + self.write_ms,
+            "command": np.concatenate(command_idx),
+            "lut_index": np.concatenate(lut_index),
+        }
+
+    def channels(self, ticks):
+        """Maps LUT ticks to the PWM values of the two servo drivers.
+
+        Like `exec_motion`, legs 0-2 go to the right driver through
+        `right_legs` and `right_offset_ticks`, and legs 3-5 to the left
+        driver through `left_legs` and `left_offset_ticks`.
+
+        Args:
+            ticks (numpy.ndarray): The LUT ticks, with shape (..., 6, 3).
+
+        Returns:
+            numpy.ndarray: The PWM values, with shape (..., 2, 16), where the
+            driver axis is (right, left). Unused channels are -1.
+        """
+        ticks = np.asarray(ticks, dtype=int)
+        pwm = np.full(ticks.shape[:-2] + (2, DRIVER_CHANNELS), -1, dtype=int)
+
+        pwm[..., 0, self.firmware["right_legs"]] = (
+            ticks[..., :3, :] + self.firmware["right_offset_ticks"]
+        )
+        pwm[..., 1, self.firmware["left_legs"]] = (
+            ticks[..., 3:, :] + self.firmware["left_offset_ticks"]
+        )
+        return pwm
+
+    def joint_ticks(self, pwm):
+        """Reads the joint ticks back from the PWM values of the drivers.
+
+        The offsets correct the installation error of every servo, so the
+        joints end up at the LUT ticks.
+
+        Args:
+            pwm (numpy.ndarray): The PWM values, with shape (..., 2, 16).
+
+        Returns:
+            numpy.ndarray: The joint ticks, with shape (..., 6, 3).
+        """
+        pwm = np.asarray(pwm, dtype=int)
+        return np.concatenate(
+            (
+                pwm[..., 0, self.firmware["right_legs"]]
+                - self.firmware["right_offset_ticks"],
+                pwm[..., 1, self.firmware["left_legs"]]
+                - self.firmware["left_offset_ticks"],
+            ),
+            axis=-2,
+        )
+
+    def simulate(self, commands):
+        """Plays motion commands and computes the body and foot state over time.
+
+        The feet at the lowest height of a frame are taken as the ones on the
+        ground. The planar motion of the body between two frames is the rigid
+        2D transform that best maps the ground feet of the first frame onto
+        the same feet of the second, assuming they do not slip.
+
+        Args:
+            commands (list): (command, cycles) pairs, see `schedule`.
+
+        Returns:
+            dict: The `schedule`, plus the keys:
+                - "time": the start time of every frame in s, with shape (frames,).
+                - "pwm": the PWM values of the drivers, with shape (frames, 2, 16).
+                - "angles": the joint angles, with shape (frames, 6, 3).
+                - "joints": the joint positions in the body frame, with shape
+                  (frames, 6, 5, 3), see `HexapodModel.joint_positions`.
+                - "contact": the feet on the ground, with shape (frames, 6).
+                - "body_height": the body height above the ground in mm.
+                - "body_pose": the (x, y, yaw) of the body on the ground in mm
+                  and rad, with shape (frames, 3).
+                - "feet": the foot positions on the ground, with shape
+                  (frames, 6, 3).
+        """
+        result = self.schedule(commands)
+        frames = len(result["ticks"])
+
+        result["time"] = (
+            np.concatenate(([0.0], np.cumsum(result["duration_ms"])[:-1])) / 1000
+            if frames > 0
+            else np.zeros(0)
+        )
+        result["pwm"] = self.channels(result["ticks"])
+
+        angles = ticks_to_angles(
+            self.joint_ticks(result["pwm"]),
+            self.firmware["servo_min"],
+            self.firmware["servo_max"],
+        )
+        joints = self.model.joint_positions(angles)
+        tips = joints[..., 4, :]
+        result["angles"] = angles
+        result["joints"] = joints
+
+        ground = np.min(tips[..., 2], axis=-1, keepdims=True) if frames > 0 else 0
+        contact = tips[..., 2] <= ground + CONTACT_TOLERANCE
+        result["contact"] = contact
+        result["body_height"] = -np.reshape(ground, (-1,))
+
+        # rigid 2D motion of the ground feet between consecutive frames,
+        # feet_next = R(dyaw) feet + t in the body frame of the first frame
+        weight = (contact[:-1] & contact[1:]).astype(float)
+        count = np.maximum(np.sum(weight, axis=-1, keepdims=True), 1)
+        src = tips[:-1, :, :2]
+        dst = tips[1:, :, :2]
+        src_mean = np.sum(src * weight[..., np.newaxis], axis=-2) / count
+        dst_mean = np.sum(dst * weight[..., np.newaxis], axis=-2) / count
+        src_c = src - src_mean[:, np.newaxis, :]
+        dst_c = dst - dst_mean[:, np.newaxis, :]
+        dot = np.sum(weight * np.sum(src_c * dst_c, axis=-1), axis=-1)
+        cross = np.sum(
+            weight * (src_c[..., 0] * dst_c[..., 1] - src_c[..., 1] * dst_c[..., 0]),
+            axis=-1,
+        )
+        feet_yaw = np.arctan2(cross, dot)
+        cos_f = np.cos(feet_yaw)
+        sin_f = np.sin(feet_yaw)
+        feet_shift = dst_mean - np.stack(
+            (
+                cos_f * src_mean[:, 0] - sin_f * src_mean[:, 1],
+                sin_f * src_mean[:, 0] + cos_f * src_mean[:, 1],
+            ),
+            axis=-1,
+        )
+
+        # the body moves by the inverse of the feet motion
+        body_yaw = -feet_yaw
+        body_shift = -np.stack(
+            (
+                cos_f * feet_shift[:, 0] + sin_f * feet_shift[:, 1],
+                -sin_f * feet_shift[:, 0] + cos_f * feet_shift[:, 1],
+            ),
+            axis=-1,
+        )
+
+        # accumulate the per frame motions in the ground frame
+        yaw = np.concatenate(([0.0], np.cumsum(body_yaw)))
+        cos_y = np.cos(yaw[:-1])
+        sin_y = np.sin(yaw[:-1])
+        step = np.stack(
+            (
+                cos_y * body_shift[:, 0] - sin_y * body_shift[:, 1],
+                sin_y * body_shift[:, 0] + cos_y * body_shift[:, 1],
+            ),
+            axis=-1,
+        )
+        position = np.concatenate((np.zeros((1, 2)), np.cumsum(step, axis=0)))
+        result["body_pose"] = np.concatenate(
+            (position, yaw[:, np.newaxis]), axis=-1
+        )[:frames]
+
+        cos_y = np.cos(yaw[:frames])[:, np.newaxis]
+        sin_y = np.sin(yaw[:frames])[:, np.newaxis]
+        feet = np.empty(np.shape(tips))
+        feet[..., 0] = cos_y * tips[..., 0] - sin_y * tips[..., 1] + position[:frames, :1]
+        feet[..., 1] = sin_y * tips[..., 0] + cos_y * tips[..., 1] + position[:frames, 1:]
+        feet[..., 2] = tips[..., 2] - np.reshape(ground, (-1, 1))
+        result["feet"] = feet
+
+        return result
@@ -0,0 +1,55 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import numpy as np
+import pytest
+
+from gait_optimizer import evaluate_gaits
+from lut_validator import gait_limits
+from path_tool import gen_walk_path
+
+
+@pytest.mark.parametrize("direction", [45, 90, 135, 180, -90])
+def test_speed_independent_of_direction(model, spec, standby, direction):
+    # the same stride has to score the same in every walking direction, up
+    # to the rounding to servo ticks
+    paths = np.stack(
+        [
+            gen_walk_path(standby, g_radius=30, direction=0),
+            gen_walk_path(standby, g_radius=30, direction=direction),
+        ]
+    )
+    # the walks of gaits.json run above the rated servo speed
+    gaits = {gait["name"]: gait for gait in spec["gaits"]}
+    measures = evaluate_gaits(
+        model,
+        paths,
+        spec["servoMin"],
+        spec["servoMax"],
+        **gait_limits(gaits["lut_walk_r45"])
+    )
+
+    assert np.all(measures["feasible"])
+    assert measures["speed"][1] == pytest.approx(measures["speed"][0], rel=0.01)
@@ -0,0 +1,115 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import numpy as np
+
+
+def _rotation_stack(angle, axis):
+    """Builds a stack of 3x3 rotation matrices around one of the main axes.
+
+    Args:
+        angle (float or numpy.ndarray): The angle(s) of rotation in degrees.
+        axis (int): The axis of rotation, 0 for x, 1 for y and 2 for z.
+
+    Returns:
+        numpy.ndarray: The rotation matrices, with shape (..., 3, 3), where
+        ... is the shape of `angle`.
+    """
+    angle = np.asarray(angle, dtype=float) / 180 * np.pi
+    cos_a = np.cos(angle)
+    sin_a = np.sin(angle)
+
+    i, j = [(1, 2), (2, 0), (0, 1)][axis]
+
+    rot = np.zeros(angle.shape + (3, 3))
+    rot[..., axis, axis] = 1
+    rot[..., i, i] = cos_a
+    rot[..., i, j] = -sin_a
+    rot[..., j, i] = sin_a
+    rot[..., j, j] = cos_a
+    return rot
+
+
+def rotate_x(angle):
+    """Returns rotation matrices for rotations around the x-axis.
+
+    Args:
+        angle (float or numpy.ndarray): The angle(s) of rotation in degrees.
+
+    Returns:
+        numpy.ndarray: The rotation matrices, with shape (..., 3, 3), where
+        ... is the shape of `angle`.
+    """
+    return _rotation_stack(angle, 0)
+
+
+def rotate_y(angle):
+    """Returns rotation matrices for rotations around the y-axis.
+
+    Args:
+        angle (float or numpy.ndarray): The angle(s) of rotation in degrees.
+
+    Returns:
+        numpy.ndarray: The rotation matrices, with shape (..., 3, 3), where
+        ... is the shape of `angle`.
+    """
+    return _rotation_stack(angle, 1)
+
+
+def rotate_z(angle):
+    """Returns rotation matrices for rotations around the z-axis.
+
+    Args:
+        angle (float or numpy.ndarray): The angle(s) of rotation in degrees.
+
+    Returns:
+        numpy.ndarray: The rotation matrices, with shape (..., 3, 3), where
+        ... is the shape of `angle`.
+    """
+    return _rotation_stack(angle, 2)
+
+
+def transform_points(points, rotation, translation=None):
+    """Applies a stack of rotations (and translations) to a set of points.
+
+    The leading dimensions of `points` and `rotation` are broadcast against
+    each other, so a single (6, 3) posture transformed by (steps, 3, 3)
+    rotations gives a (steps, 6, 3) path.
+
+    Args:
+        points (numpy.ndarray): The points, with shape (..., n, 3).
+        rotation (numpy.ndarray): The rotation matrices, with shape (..., 3, 3).
+        translation (numpy.ndarray, optional): The translations applied after
+            the rotation, with shape (..., 3). Defaults to None.
+
+    Returns:
+        numpy.ndarray: The transformed points, with shape (..., n, 3).
+    """
+    result = np.matmul(np.asarray(points, dtype=float), np.swapaxes(rotation, -1, -2))
+
+    if translation is not None:
+        result = result + np.asarray(translation)[..., np.newaxis, :]
+
+    return result
@@ -0,0 +1,168 @@
+#
+# 2021  Zhengyu Peng
+# Website: https://zpeng.me
+#
+# `                      `
+# -:.                  -#:
+# -//:.              -###:
+# -////:.          -#####:
+# -/:.://:.      -###++##:
+# ..   `://:-  -###+. :##:
+#        `:/+####+.   :##:
+# .::::::::/+###.     :##:
+# .////-----+##:    `:###:
+#  `-//:.   :##:  `:###/.
+#    `-//:. :##:`:###/.
+#      `-//:+######/.
+#        `-/+####/.
+#          `+##+.
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#           :##:
+#            .+:
+
+import numpy as np
+
+from lut_encoding import render_encoded_lut
+
+
+def gait_velocity(path):
+    """Estimates the per-frame velocity of a looping gait.
+
+    Args:
+        path (numpy.ndarray): The path, with shape (steps, 6, 3).
+
+    Returns:
+        numpy.ndarray: The central difference of every frame, with shape
+        (steps, 6, 3), in units per frame.
+    """
+    return (np.roll(path, -1, axis=0) - np.roll(path, 1, axis=0)) / 2
+
+
+def min_jerk_blend(start, start_velocity, end, end_velocity, frames):
+    """Blends two states with a quintic minimum-jerk trajectory.
+
+    The trajectory matches the position and velocity at both ends, with zero
+    acceleration, so the motion continues smoothly out of `start` and into
+    `end`. Only the in-between frames are returned.
+
+    Args:
+        start (numpy.ndarray): The start positions, with shape (..., 6, 3).
+        start_velocity (numpy.ndarray): The start velocities in units per frame.
+        end (numpy.ndarray): The end positions, with shape (..., 6, 3).
+        end_velocity (numpy.ndarray): The end velocities in units per frame.
+        frames (int): The number of in-between frames.
+
+    Returns:
+        numpy.ndarray: The blend, with shape (..., frames, 6, 3).
+    """
+    duration = frames + 1
+    t = np.arange(1, duration) / duration
+
+    t3 = t**3
+    t4 = t**4
+    t5 = t**5
+    # quintic Hermite basis with zero end accelerations, (frames, 1, 1)
+    basis = [
+        (10 * t3 - 15 * t4 + 6 * t5),
+        (t - 6 * t3 + 8 * t4 - 3 * t5) * duration,
+        (-4 * t3 + 7 * t4 - 3 * t5) * duration,
+    ]
+    basis = [h[:, np.newaxis, np.newaxis] for h in basis]
+
+    start = np.asarray(start, dtype=float)[..., np.newaxis, :, :]
+    end = np.asarray(end, dtype=float)[..., np.newaxis, :, :]
+    start_velocity = np.asarray(start_velocity, dtype=float)[..., np.newaxis, :, :]
+    end_velocity = np.asarray(end_velocity, dtype=float)[..., np.newaxis, :, :]
+
+    return (
+        start
+        + (end - start) * basis[0]
+        + start_velocity * basis[1]
+        + end_velocity * basis[2]
+    )
+
+
+def gen_transition_path(path_a, path_b, frames=8, entry_phase=0):
+    """Generates the blends from every phase of gait A into gait B.
+
+    Args:
+        path_a (numpy.ndarray): The path of gait A, with shape (steps_a, 6, 3).
+        path_b (numpy.ndarray): The path of gait B, with shape (steps_b, 6, 3).
+        frames (int, optional): The number of frames of a blend. Defaults to 8.
+        entry_phase (int, optional): The frame of gait B the blends lead into.
+            Defaults to 0.
+
+    Returns:
+        numpy.ndarray: The leg tip blends, with shape (steps_a, frames, 6, 3).
+        Blend `i` runs after frame `i` of gait A, and is followed by frame
+        `entry_phase` of gait B.
+    """
+    path_a = np.asarray(path_a, dtype=float)
+    path_b = np.asarray(path_b, dtype=float)
+
+    return min_jerk_blend(
+        path_a,
+        gait_velocity(path_a),
+        path_b[entry_phase],
+        gait_velocity(path_b)[entry_phase],
+        frames,
+    )
+
+
+def transition_angles(model, paths, pairs, frames=8, entry_phase=None):
+    """Solves the transitions of many gait pairs in a single IK pass.
+
+    Args:
+        model (HexapodModel): The compiled hexapod model.
+        paths (dict): The gait paths keyed by gait name, each with shape
+            (steps, 6, 3).
+        pairs (list): The ordered (gait A, gait B) name pairs.
+        frames (int, optional): The number of frames of a blend. Defaults to 8.
+        entry_phase (dict, optional): The entry frame of every gait B, keyed by
+            name. Defaults to None, which enters all gaits at frame 0.
+
+    Returns:
+        dict: The joint angles of the blends in degrees keyed by
+        (gait A, gait B), each with shape (steps_a, frames, 6, 3), indexed by
+        the phase of gait A. Unreachable frames are NaN.
+    """
+    if entry_phase is None:
+        entry_phase = {}
+
+    blends = [
+        gen_transition_path(
+            paths[name_a], paths[name_b], frames, entry_phase.get(name_b, 0)
+        )
+        for name_a, name_b in pairs
+    ]
+    if not blends:
+        return {}
+
+    with np.errstate(invalid="ignore"):
+        angles = model.inverse_kinematics(np.concatenate(blends))
+    splits = np.cumsum([np.shape(blend)[0] for blend in blends])[:-1]
+
+    return dict(zip(pairs, np.split(angles, splits)))
+
+
+def render_transitions(table):
+    """Renders a transition table as C source.
+
+    Every pair becomes `<A>_to_<B>[steps_a][frames][6][3]`, so the firmware
+    picks the blend by the current frame of gait A.
+
+    Args:
+        table (dict): The servo ticks of the blends keyed by (gait A, gait B).
+
+    Returns:
+        str: The declarations of all the transitions.
+    """
+    return "".join(
+        render_encoded_lut(
+            name_a + "_to_" + name_b, {"": ticks.astype(np.int32)}
+        )
+        for (name_a, name_b), ticks in table.items()
+    )
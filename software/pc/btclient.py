@@ -39,7 +39,8 @@
 
 """
 
-from PySide6.QtCore import QObject, Signal, Slot
+from PySide6.QtCore import QObject, QSocketNotifier, QTimer, Signal, Slot
+import errno
 import socket
 
 
@@ -55,51 +56,126 @@ class BluetoothClient(QObject):
     SIG_STOP = 1
     SIG_DISCONNECT = 2
 
-    def __init__(self, mac, port):
-        QObject.__init__(self)
+    # give up connecting after this many milliseconds
+    CONNECT_TIMEOUT = 5000
+
+    def __init__(self, mac, port, parent=None):
+        QObject.__init__(self, parent)
 
         self.mac = mac
         self.port = port
         self.bt_socket = socket.socket(
             socket.AF_BLUETOOTH, socket.SOCK_STREAM, socket.BTPROTO_RFCOMM)
-        self.bt_socket.settimeout(1)
+        self.bt_socket.setblocking(False)
+
+        # the RFCOMM socket is not a Qt socket, readiness is reported by
+        # notifiers on its descriptor, so the client runs in the event loop
+        # of its thread like the QTcpSocket based transports
+        self.read_notifier = QSocketNotifier(
+            self.bt_socket.fileno(), QSocketNotifier.Read, self)
+        self.read_notifier.setEnabled(False)
+        self.read_notifier.activated.connect(self.on_ready_read)
+        self.write_notifier = QSocketNotifier(
+            self.bt_socket.fileno(), QSocketNotifier.Write, self)
+        self.write_notifier.setEnabled(False)
+        self.write_notifier.activated.connect(self.on_ready_write)
+
+        self.connect_timer = QTimer(self)
+        self.connect_timer.setSingleShot(True)
+        self.connect_timer.timeout.connect(self.on_connect_timeout)
+
+        self.is_connected = False
+        self.write_buffer = b''
 
         self.signal = self.SIG_NORMAL
 
     @Slot()
     def start(self):
-        try:
-            self.bt_socket.connect((self.mac, self.port))
-        except OSError as err:
-            print(err)
-            # self.status.emit(self.STOP, '')
-        else:
-            # print('connected')
-            self.status.emit(self.CONNECTED, self.mac)
-
-            while True:
-                if self.signal == self.SIG_NORMAL:
-                    try:
-
-                        data = self.bt_socket.recv(4096)
-                    except socket.timeout as t_out:
-                        pass
-                    else:
-                        if data:
-                            self.message.emit(
-                                self.mac+' ('+str(self.port)+')',
-                                data.decode())
-                        else:
-                            break
-                elif self.signal == self.SIG_DISCONNECT:
-                    self.signal = self.SIG_NORMAL
-                    self.bt_socket.close()
-                    break
-        finally:
-            self.status.emit(self.STOP, '')
+        self.signal = self.SIG_NORMAL
+        err = self.bt_socket.connect_ex((self.mac, self.port))
+        if err not in (0, errno.EINPROGRESS, errno.EAGAIN, errno.EWOULDBLOCK):
+            print(OSError(err, errno.errorcode.get(err, str(err))))
+            self.close()
+            return
+
+        # writable means the non-blocking connect has completed
+        self.connect_timer.start(self.CONNECT_TIMEOUT)
+        self.write_notifier.setEnabled(True)
 
     def send(self, msg):
-        self.bt_socket.sendall(msg.encode())
+        # text commands, or frames of `protocol.Encoder`
+        if isinstance(msg, str):
+            msg = msg.encode()
+        self.write_buffer += msg
+        if self.is_connected:
+            self.flush()
+
+    def backlog(self):
+        # bytes written but not yet accepted by the socket
+        return len(self.write_buffer)
 
     def close(self):
         self.signal = self.SIG_DISCONNECT
+        self.stop()
+
+    def stop(self):
+        self.connect_timer.stop()
+        self.read_notifier.setEnabled(False)
+        self.write_notifier.setEnabled(False)
+        if self.signal != self.SIG_STOP:
+            self.signal = self.SIG_STOP
+            self.is_connected = False
+            self.bt_socket.close()
+            self.status.emit(self.STOP, '')
+
+    def flush(self):
+        try:
+            sent = self.bt_socket.send(self.write_buffer)
+        except BlockingIOError:
+            sent = 0
+        except OSError as err:
+            print(err)
+            self.stop()
+            return
+
+        self.write_buffer = self.write_buffer[sent:]
+        # wait for the socket to drain before writing the rest
+        self.write_notifier.setEnabled(len(self.write_buffer) > 0)
+
+    def on_ready_write(self, *args):
+        if self.is_connected:
+            self.flush()
+            return
+
+        self.connect_timer.stop()
+        err = self.bt_socket.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if err:
+            print(OSError(err, errno.errorcode.get(err, str(err))))
+            self.stop()
+            return
+
+        self.is_connected = True
+        self.read_notifier.setEnabled(True)
+        self.status.emit(self.CONNECTED, self.mac)
+        self.flush()
+
+    def on_ready_read(self, *args):
+        try:
+            data = self.bt_socket.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError as err:
+            print(err)
+            self.stop()
+            return
+
+        if data:
+            self.message.emit(
+                self.mac+' ('+str(self.port)+')',
+                data.decode())
+        else:
+            self.stop()
+
+    def on_connect_timeout(self):
+        print('timed out')
+        self.stop()
@@ -0,0 +1,183 @@
+"""
+    Copyright (C) 2017 - PRESENT  Zhengyu Peng, https://zpeng.me
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    ----------
+
+    `                      `
+    -:.                  -#:
+    -//:.              -###:
+    -////:.          -#####:
+    -/:.://:.      -###++##:
+    ..   `://:-  -###+. :##:
+           `:/+####+.   :##:
+    .::::::::/+###.     :##:
+    .////-----+##:    `:###:
+     `-//:.   :##:  `:###/.
+       `-//:. :##:`:###/.
+         `-//:+######/.
+           `-/+####/.
+             `+##+.
+              :##:
+              :##:
+              :##:
+              :##:
+              :##:
+               .+:
+
+"""
+
+from PySide6.QtCore import QObject, Signal
+
+from tcpclient import TCPClient
+from udpclient import UDPClient
+from btclient import BluetoothClient
+from protocol import Encoder
+
+
+class Fleet(QObject):
+    """Pool of robot connections keyed by robot ID.
+
+    Every robot has its own transport, TCP, UDP or Bluetooth, and any number
+    of group names. All the transports are non-blocking and share the event
+    loop of the thread the fleet lives in, so a broadcast to the whole fleet
+    is one buffered write per robot and returns immediately. A robot whose
+    transport still holds more than `MAX_BACKLOG` unsent bytes is skipped,
+    so a stalled robot cannot delay the commands to the others, nor build up
+    a queue of stale commands of its own.
+    """
+    robot_status = Signal(object, int, object)
+    robot_message = Signal(object, object, object)
+
+    TRANSPORTS = {
+        'tcp': TCPClient,
+        'udp': UDPClient,
+        'bluetooth': BluetoothClient,
+    }
+
+    MAX_BACKLOG = 256
+
+    def __init__(self, parent=None):
+        QObject.__init__(self, parent)
+
+        self.robots = dict()
+
+    def add_robot(self, robot_id, transport, address, port, groups=(),
+                  protocol='text'):
+        """Adds a robot to the fleet and starts connecting to it.
+
+        `protocol` is 'text' or 'binary', see `protocol.Encoder`. A robot
+        already in the fleet under the same ID is replaced.
+        """
+        if transport not in self.TRANSPORTS:
+            raise ValueError('unknown transport: ' + str(transport))
+        if protocol not in ('text', 'binary'):
+            raise ValueError('unknown protocol: ' + str(protocol))
+        if robot_id in self.robots:
+            self.remove_robot(robot_id)
+
+        client = self.TRANSPORTS[transport](address, int(port), self)
+        client.status.connect(
+            lambda status, addr: self.on_status_update(robot_id, status, addr))
+        client.message.connect(
+            lambda source, msg: self.robot_message.emit(robot_id, source, msg))
+
+        self.robots[robot_id] = {
+            'client': client,
+            'transport': transport,
+            'address': address,
+            'port': int(port),
+            'groups': set(groups),
+            'encoder': Encoder(binary=protocol == 'binary'),
+            'status': client.STOP,
+        }
+        client.start()
+
+    def remove_robot(self, robot_id):
+        robot = self.robots.pop(robot_id)
+        robot['client'].status.disconnect()
+        robot['client'].message.disconnect()
+        robot['client'].close()
+        robot['client'].deleteLater()
+
+    def load(self, robots):
+        """Adds the robots of a list of dicts, as stored in `config.json`.
+
+        Every dict has the keys 'id', 'transport', 'address', 'port' and
+        optionally 'groups' and 'protocol'.
+        """
+        for robot in robots:
+            self.add_robot(
+                robot['id'],
+                robot['transport'],
+                robot['address'],
+                robot['port'],
+                robot.get('groups', ()),
+                robot.get('protocol', 'text'))
+
+    def close(self):
+        for robot_id in list(self.robots):
+            self.remove_robot(robot_id)
+
+    def on_status_update(self, robot_id, status, addr):
+        if robot_id in self.robots:
+            self.robots[robot_id]['status'] = status
+        self.robot_status.emit(robot_id, status, addr)
+
+    def status(self, robot_id):
+        return self.robots[robot_id]['status']
+
+    def connected(self, group=None):
+        return [
+            robot_id for robot_id, robot in self.robots.items()
+            if robot['status'] == robot['client'].CONNECTED
+            and (group is None or group in robot['groups'])
+        ]
+
+    def send(self, robot_ids, msg, **params):
+        """Sends a command to the given robots.
+
+        `msg` is a text command such as 'walk0:', encoded for every robot
+        in its own protocol, with the optional `params` of
+        `protocol.Encoder.encode`. Returns the IDs the command was written
+        to. Robots that are not connected, or whose backlog exceeds
+        `MAX_BACKLOG`, are left out.
+        """
+        return self.write(
+            robot_ids, lambda encoder: encoder.encode(msg, **params))
+
+    def send_setpoint(self, robot_ids, speed, heading):
+        """Sends a streamed setpoint to the given robots, see `send`."""
+        return self.write(
+            robot_ids,
+            lambda encoder: encoder.encode_setpoint(speed, heading))
+
+    def write(self, robot_ids, encode):
+        sent = []
+        for robot_id in robot_ids:
+            robot = self.robots.get(robot_id)
+            if robot is None or robot['status'] != robot['client'].CONNECTED:
+                continue
+            if robot['client'].backlog() > self.MAX_BACKLOG:
+                continue
+            robot['client'].send(encode(robot['encoder']))
+            sent.append(robot_id)
+        return sent
+
+    def send_group(self, group, msg, **params):
+        return self.send(self.connected(group), msg, **params)
+
+    def broadcast(self, msg, **params):
+        return self.send(self.connected(), msg, **params)
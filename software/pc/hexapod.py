@@ -42,7 +42,7 @@
 import sys
 from PySide6 import QtWidgets, QtCore, QtGui
 from PySide6.QtCore import Qt
-from PySide6.QtCore import QThread, QFile
+from PySide6.QtCore import QFile
 from PySide6.QtUiTools import QUiLoader
 
 import psutil
@@ -52,7 +52,11 @@ from pathlib import Path
 import json
 
 from tcpclient import TCPClient
+from udpclient import UDPClient
 from btclient import BluetoothClient
+from fleet import Fleet
+from protocol import Encoder
+from streaming import SetpointStreamer, SyntheticSource
 
 QtWidgets.QApplication.setAttribute(
     QtCore.Qt.AA_EnableHighDpiScaling, True)  # enable highdpi scaling
@@ -112,6 +116,30 @@ class MyApp(QtWidgets.QMainWindow):
         self.is_tcp_connected = False
         self.is_bluetooth_connected = False
 
+        # robots listed under 'Fleet' in config.json, each entry as
+        # {"id": ..., "transport": "tcp"|"udp"|"bluetooth", "address": ...,
+        # "port": ..., "groups": [...]}, commands go to all of them or to
+        # the robots of 'Fleet_Group'
+        self.fleet = Fleet(self)
+        self.fleet.robot_status.connect(self.on_fleet_status_update)
+        self.fleet.robot_message.connect(self.on_fleet_message_ready)
+        self.fleet.load(self.config.get('Fleet', []))
+
+        # streaming control, the heading dial and the speed slider (or a
+        # synthetic input with 'Stream_Source': 'synthetic') are sampled at
+        # 'Stream_Rate' Hz, and only the latest setpoint is sent
+        if self.config.get('Stream_Source', 'dial') == 'synthetic':
+            stream_source = SyntheticSource()
+        else:
+            stream_source = self.read_stream_input
+        self.streamer = SetpointStreamer(
+            self.send_setpoint,
+            stream_source,
+            self.transport_backlog,
+            rate=self.config.get('Stream_Rate', 50),
+            parent=self)
+        self.ui.checkBox_Stream.toggled.connect(self.on_stream_toggled)
+
         self.ui.comboBox_Interface.currentIndexChanged.connect(
             self.on_interface_selection_changed
         )
@@ -248,6 +276,8 @@ class MyApp(QtWidgets.QMainWindow):
         tcp_client_port = self.config.get('TCP_Client_Port', '1234')
         self.ui.lineEdit_TcpClientTargetIP.setText(tcp_client_ip)
         self.ui.lineEdit_TcpClientTargetPort.setText(tcp_client_port)
+        self.ui.comboBox_Protocol.setCurrentText(
+            self.config.get('TCP_Client_Protocol', 'TCP'))
 
         # Bluetooth Client
         self.ui.lineEditBtMac.setText(
@@ -259,176 +289,110 @@ class MyApp(QtWidgets.QMainWindow):
         self.ui.status_bar.setStyleSheet('color: green')
         self.ui.status_bar.showMessage('● Idle')
 
-    def on_standby_button_clicked(self):
+    def send_command(self, cmd):
         if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_STANDBY)
-            self.append_message(self.CMD_STANDBY)
+            self.tcp_client.send(self.tcp_encoder.encode(cmd))
+            self.append_message(cmd)
 
         if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_STANDBY)
-            self.append_message(self.CMD_STANDBY)
+            self.bt_client.send(self.bt_encoder.encode(cmd))
+            self.append_message(cmd)
 
-    def on_forward_button_clicked(self):
+        fleet_group = self.config.get('Fleet_Group', None)
+        if fleet_group is None:
+            sent = self.fleet.broadcast(cmd)
+        else:
+            sent = self.fleet.send_group(fleet_group, cmd)
+        if sent:
+            self.append_message(cmd + ' → ' + ', '.join(map(str, sent)))
+
+    def send_setpoint(self, speed, heading):
         if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_WALK_0)
-            self.append_message(self.CMD_WALK_0)
+            self.tcp_client.send(
+                self.tcp_encoder.encode_setpoint(speed, heading))
 
         if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_WALK_0)
-            self.append_message(self.CMD_WALK_0)
+            self.bt_client.send(
+                self.bt_encoder.encode_setpoint(speed, heading))
 
-    def on_right45_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_WALK_R45)
-            self.append_message(self.CMD_WALK_R45)
+        fleet_group = self.config.get('Fleet_Group', None)
+        self.fleet.send_setpoint(
+            self.fleet.connected(fleet_group), speed, heading)
 
+    def transport_backlog(self):
+        # the fleet skips its own backlogged robots
+        backlog = 0
+        if self.is_tcp_connected:
+            backlog = max(backlog, self.tcp_client.backlog())
         if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_WALK_R45)
-            self.append_message(self.CMD_WALK_R45)
+            backlog = max(backlog, self.bt_client.backlog())
+        return backlog
 
-    def on_shiftright_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_WALK_R90)
-            self.append_message(self.CMD_WALK_R90)
+    def read_stream_input(self):
+        return self.ui.slider_Speed.value(), self.ui.dial_Heading.value()
 
-        if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_WALK_R90)
-            self.append_message(self.CMD_WALK_R90)
+    def on_stream_toggled(self, checked):
+        if checked:
+            self.streamer.start()
+        elif self.streamer.is_active():
+            self.streamer.stop()
 
-    def on_right135_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_WALK_R135)
-            self.append_message(self.CMD_WALK_R135)
+    def on_standby_button_clicked(self):
+        self.send_command(self.CMD_STANDBY)
 
-        if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_WALK_R135)
-            self.append_message(self.CMD_WALK_R135)
+    def on_forward_button_clicked(self):
+        self.send_command(self.CMD_WALK_0)
 
-    def on_backward_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_WALK_180)
-            self.append_message(self.CMD_WALK_180)
+    def on_right45_button_clicked(self):
+        self.send_command(self.CMD_WALK_R45)
 
-        if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_WALK_180)
-            self.append_message(self.CMD_WALK_180)
+    def on_shiftright_button_clicked(self):
+        self.send_command(self.CMD_WALK_R90)
 
-    def on_left45_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_WALK_L45)
-            self.append_message(self.CMD_WALK_L45)
+    def on_right135_button_clicked(self):
+        self.send_command(self.CMD_WALK_R135)
 
-        if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_WALK_L45)
-            self.append_message(self.CMD_WALK_L45)
+    def on_backward_button_clicked(self):
+        self.send_command(self.CMD_WALK_180)
 
-    def on_shiftleft_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_WALK_L90)
-            self.append_message(self.CMD_WALK_L90)
+    def on_left45_button_clicked(self):
+        self.send_command(self.CMD_WALK_L45)
 
-        if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_WALK_L90)
-            self.append_message(self.CMD_WALK_L90)
+    def on_shiftleft_button_clicked(self):
+        self.send_command(self.CMD_WALK_L90)
 
     def on_left135_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_WALK_L135)
-            self.append_message(self.CMD_WALK_L135)
-
-        if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_WALK_L135)
-            self.append_message(self.CMD_WALK_L135)
+        self.send_command(self.CMD_WALK_L135)
 
     def on_fastforward_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_FASTFORWARD)
-            self.append_message(self.CMD_FASTFORWARD)
-
-        if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_FASTFORWARD)
-            self.append_message(self.CMD_FASTFORWARD)
+        self.send_command(self.CMD_FASTFORWARD)
 
     def on_fastback_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_FASTBACKWARD)
-            self.append_message(self.CMD_FASTBACKWARD)
-
-        if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_FASTBACKWARD)
-            self.append_message(self.CMD_FASTBACKWARD)
+        self.send_command(self.CMD_FASTBACKWARD)
 
     def on_turnleft_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_TURNLEFT)
-            self.append_message(self.CMD_TURNLEFT)
-
-        if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_TURNLEFT)
-            self.append_message(self.CMD_TURNLEFT)
+        self.send_command(self.CMD_TURNLEFT)
 
     def on_turnright_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_TURNRIGHT)
-            self.append_message(self.CMD_TURNRIGHT)
-
-        if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_TURNRIGHT)
-            self.append_message(self.CMD_TURNRIGHT)
+        self.send_command(self.CMD_TURNRIGHT)
 
     def on_rotatex_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_ROTATEX)
-            self.append_message(self.CMD_ROTATEX)
-
-        if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_ROTATEX)
-            self.append_message(self.CMD_ROTATEX)
+        self.send_command(self.CMD_ROTATEX)
 
     def on_rotatey_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_ROTATEY)
-            self.append_message(self.CMD_ROTATEY)
-
-        if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_ROTATEY)
-            self.append_message(self.CMD_ROTATEY)
+        self.send_command(self.CMD_ROTATEY)
 
     def on_rotatez_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_ROTATEZ)
-            self.append_message(self.CMD_ROTATEZ)
-
-        if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_ROTATEZ)
-            self.append_message(self.CMD_ROTATEZ)
+        self.send_command(self.CMD_ROTATEZ)
 
     def on_twist_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_TWIST)
-            self.append_message(self.CMD_TWIST)
-
-        if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_TWIST)
-            self.append_message(self.CMD_TWIST)
+        self.send_command(self.CMD_TWIST)
 
     def on_climbforward_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_CLIMBFORWARD)
-            self.append_message(self.CMD_CLIMBFORWARD)
-
-        if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_CLIMBFORWARD)
-            self.append_message(self.CMD_CLIMBFORWARD)
+        self.send_command(self.CMD_CLIMBFORWARD)
 
     def on_climbbackward_button_clicked(self):
-        if self.is_tcp_connected:
-            self.tcp_client.send(self.CMD_CLIMBBACKWARD)
-            self.append_message(self.CMD_CLIMBBACKWARD)
-
-        if self.is_bluetooth_connected:
-            self.bt_client.send(self.CMD_CLIMBBACKWARD)
-            self.append_message(self.CMD_CLIMBBACKWARD)
+        self.send_command(self.CMD_CLIMBBACKWARD)
 
     def on_interface_refresh_button_clicked(self):
         self.net_if = psutil.net_if_addrs()
@@ -485,22 +449,33 @@ class MyApp(QtWidgets.QMainWindow):
             self.ui.buttonTcpConnect.setEnabled(False)
             self.ui.lineEdit_TcpClientTargetIP.setEnabled(False)
             self.ui.lineEdit_TcpClientTargetPort.setEnabled(False)
+            self.ui.comboBox_Protocol.setEnabled(False)
+
+            if self.ui.comboBox_Protocol.currentText() == 'UDP':
+                client = UDPClient
+            else:
+                client = TCPClient
 
-            self.tcp_client_thread = QThread()
-            self.tcp_client = TCPClient(
+            # all the transports are readiness driven and share the event
+            # loop of the GUI thread
+            self.tcp_client = client(
                 self.ui.lineEdit_TcpClientTargetIP.text(),
-                int(self.ui.lineEdit_TcpClientTargetPort.text()))
+                int(self.ui.lineEdit_TcpClientTargetPort.text()),
+                self)
 
-            self.tcp_client_thread.started.connect(self.tcp_client.start)
             self.tcp_client.status.connect(self.on_tcp_client_status_update)
             self.tcp_client.message.connect(self.on_tcp_client_message_ready)
+            if client is UDPClient:
+                self.tcp_client.latency.connect(self.on_udp_client_latency)
 
-            self.tcp_client.moveToThread(self.tcp_client_thread)
-
-            self.tcp_client_thread.start()
+            # 'Protocol' in config.json, 'text' or 'binary' framing
+            self.tcp_encoder = Encoder(
+                binary=self.config.get('Protocol', 'text') == 'binary')
+            self.tcp_client.start()
 
             self.config['TCP_Client_IP'] = self.ui.lineEdit_TcpClientTargetIP.text()
             self.config['TCP_Client_Port'] = self.ui.lineEdit_TcpClientTargetPort.text()
+            self.config['TCP_Client_Protocol'] = self.ui.comboBox_Protocol.currentText()
             self.save_config()
 
         elif self.ui.buttonTcpConnect.text() == 'Disconnect':
@@ -512,19 +487,23 @@ class MyApp(QtWidgets.QMainWindow):
             self.is_tcp_connected = False
             self.tcp_client.status.disconnect()
             self.tcp_client.message.disconnect()
+            if isinstance(self.tcp_client, UDPClient):
+                self.tcp_client.latency.disconnect()
 
             self.ui.buttonTcpConnect.setText('Connect')
-            self.tcp_client_thread.quit()
+            self.tcp_client.deleteLater()
 
             self.ui.button_Refresh.setEnabled(True)
             self.ui.comboBox_Interface.setEnabled(True)
 
             self.ui.lineEdit_TcpClientTargetIP.setEnabled(True)
             self.ui.lineEdit_TcpClientTargetPort.setEnabled(True)
+            self.ui.comboBox_Protocol.setEnabled(True)
 
-            if not self.is_bluetooth_connected:
+            if not self.is_bluetooth_connected and not self.fleet.connected():
                 self.ui.textBrowserMessage.setEnabled(False)
                 self.ui.groupBox_Control.setEnabled(False)
+                self.ui.checkBox_Stream.setChecked(False)
 
             self.ui.status_bar.clearMessage()
             self.ui.status_bar.setStyleSheet('color: green')
@@ -563,6 +542,15 @@ class MyApp(QtWidgets.QMainWindow):
             msg +
             '<br></div>')
 
+    def on_udp_client_latency(self, rtt):
+        stats = self.tcp_client.latency_stats()
+        self.ui.status_bar.showMessage(
+            '● Connected to ' +
+            self.ui.lineEdit_TcpClientTargetIP.text() +
+            ':'+self.ui.lineEdit_TcpClientTargetPort.text() +
+            ' (UDP)  RTT {:.1f} ms, mean {:.1f} ms, max {:.1f} ms, lost {}'.format(
+                rtt, stats['mean'], stats['max'], stats['lost']))
+
         # Bluetooth Client
     def on_bt_client_connect_button_clicked(self):
         if self.ui.buttonBtConnect.text() == 'Connect':
@@ -570,18 +558,17 @@ class MyApp(QtWidgets.QMainWindow):
             self.ui.lineEditBtMac.setEnabled(False)
             self.ui.lineEditBtPort.setEnabled(False)
 
-            self.bt_client_thread = QThread()
             self.bt_client = BluetoothClient(
                 self.ui.lineEditBtMac.text(),
-                int(self.ui.lineEditBtPort.text()))
+                int(self.ui.lineEditBtPort.text()),
+                self)
 
-            self.bt_client_thread.started.connect(self.bt_client.start)
             self.bt_client.status.connect(self.on_bt_client_status_update)
             self.bt_client.message.connect(self.on_bt_client_message_ready)
 
-            self.bt_client.moveToThread(self.bt_client_thread)
-
-            self.bt_client_thread.start()
+            self.bt_encoder = Encoder(
+                binary=self.config.get('Protocol', 'text') == 'binary')
+            self.bt_client.start()
 
             self.config['Bluetooth_Client_MAC'] = self.ui.lineEditBtMac.text()
             self.config['Bluetooth_Client_Port'] = self.ui.lineEditBtPort.text(
@@ -599,14 +586,15 @@ class MyApp(QtWidgets.QMainWindow):
             self.bt_client.message.disconnect()
 
             self.ui.buttonBtConnect.setText('Connect')
-            self.bt_client_thread.quit()
+            self.bt_client.deleteLater()
 
             self.ui.lineEditBtMac.setEnabled(True)
             self.ui.lineEditBtPort.setEnabled(True)
 
-            if not self.is_tcp_connected:
+            if not self.is_tcp_connected and not self.fleet.connected():
                 self.ui.textBrowserMessage.setEnabled(False)
                 self.ui.groupBox_Control.setEnabled(False)
+                self.ui.checkBox_Stream.setChecked(False)
 
             # self.status['Bluetooth']['Client'] = '[CLIENT] Idle'
 
@@ -629,6 +617,39 @@ class MyApp(QtWidgets.QMainWindow):
             msg +
             '<br></div>')
 
+    # Fleet
+    def on_fleet_status_update(self, robot_id, status, addr):
+        connected = self.fleet.connected()
+        if connected:
+            self.ui.groupBox_Control.setEnabled(True)
+            self.ui.textBrowserMessage.setEnabled(True)
+        elif not self.is_tcp_connected and not self.is_bluetooth_connected:
+            self.ui.textBrowserMessage.setEnabled(False)
+            self.ui.groupBox_Control.setEnabled(False)
+            self.ui.checkBox_Stream.setChecked(False)
+
+        if status == TCPClient.CONNECTED:
+            self.append_message(str(robot_id) + ' connected')
+        elif status == TCPClient.STOP:
+            self.append_message(str(robot_id) + ' disconnected')
+
+        self.ui.status_bar.clearMessage()
+        self.ui.status_bar.setStyleSheet('color: green')
+        self.ui.status_bar.showMessage(
+            '● Fleet: ' + str(len(connected)) + '/' +
+            str(len(self.fleet.robots)) + ' connected')
+
+    def on_fleet_message_ready(self, robot_id, source, msg):
+        self.ui.textBrowserMessage.append(
+            '<div style="color: #2196F3;"><strong>— [' +
+            str(robot_id) + '] ' +
+            source +
+            ' —</strong></div>')
+        self.ui.textBrowserMessage.append(
+            '<div style="color: #2196F3;">' +
+            msg +
+            '<br></div>')
+
     def append_message(self, message):
         self.ui.textBrowserMessage.append(
             '<div><strong>— ' +
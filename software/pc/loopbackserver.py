@@ -0,0 +1,246 @@
+"""
+    Copyright (C) 2017 - PRESENT  Zhengyu Peng, https://zpeng.me
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    ----------
+
+    `                      `
+    -:.                  -#:
+    -//:.              -###:
+    -////:.          -#####:
+    -/:.://:.      -###++##:
+    ..   `://:-  -###+. :##:
+           `:/+####+.   :##:
+    .::::::::/+###.     :##:
+    .////-----+##:    `:###:
+     `-//:.   :##:  `:###/.
+       `-//:. :##:`:###/.
+         `-//:+######/.
+           `-/+####/.
+             `+##+.
+              :##:
+              :##:
+              :##:
+              :##:
+              :##:
+               .+:
+
+"""
+
+import argparse
+import random
+import socket
+import threading
+import time
+
+from protocol import OPCODES, Decoder, Encoder
+
+
+class UDPLoopbackServer:
+    """Local stand-in for the `AsyncUDP` listener of the firmware.
+
+    Every datagram is answered with "Got N bytes of data", after an optional
+    artificial `delay` in seconds. Its commands, text as parsed by
+    `hexapod_arduino.ino` or binary frames of `protocol`, are decoded with
+    one `protocol.Decoder` per sender, and kept in `commands` as
+    (time, address, protocol.Command) tuples. Unknown commands are dropped
+    as the firmware does.
+    """
+
+    def __init__(self, ip='127.0.0.1', port=1234, delay=0.0):
+        self.delay = delay
+        self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp_socket.bind((ip, port))
+        self.udp_socket.settimeout(0.1)
+        self.ip, self.port = self.udp_socket.getsockname()
+
+        self.commands = []
+        self.decoders = dict()
+        self.datagrams = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.udp_socket.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def serve(self):
+        while self.running:
+            try:
+                data, addr = self.udp_socket.recvfrom(4096)
+            except socket.timeout:
+                continue
+
+            self.on_packet(data, addr)
+            self.datagrams += 1
+
+            if self.delay > 0:
+                time.sleep(self.delay)
+            self.udp_socket.sendto(
+                ('Got %u bytes of data' % len(data)).encode(), addr)
+
+    def on_packet(self, data, addr):
+        decoder = self.decoders.setdefault(addr, Decoder())
+        now = time.perf_counter()
+        for command in decoder.feed_packet(data):
+            self.commands.append((now, addr, command))
+
+
+def run_protocol_check(count=1000, drop=0.0, reorder=0.0, binary=True,
+                       seed=None, timeout=2.0):
+    """Sends random commands to a `UDPLoopbackServer` and checks the result.
+
+    A fraction `drop` of the datagrams is never sent and a fraction
+    `reorder` is swapped with the next one, the first and the last datagram
+    are always sent in place. The decoder of the server has to report
+    exactly the dropped and reordered frames, and mark the reordered ones
+    stale. Returns a dict with the injected faults, the decoder statistics
+    and 'ok'.
+    """
+    rng = random.Random(seed)
+    names = list(OPCODES)
+    encoder = Encoder(binary=binary)
+
+    sent = []
+    for _ in range(count):
+        name = rng.choice(names)
+        if binary and name == 'setpoint':
+            params = {
+                'speed': rng.randint(-200, 200),
+                'heading': rng.randint(-180, 180),
+                'steps': rng.randint(0, 1000),
+            }
+        else:
+            params = {}
+        sent.append((name, params, encoder.encode(name, **params)))
+
+    packets = [sent[0]] + [
+        packet for packet in sent[1:-1] if rng.random() >= drop
+    ] + [sent[-1]]
+    dropped = len(sent) - len(packets)
+
+    swapped = 0
+    idx = 1
+    while idx < len(packets) - 2:
+        if rng.random() < reorder:
+            packets[idx], packets[idx + 1] = packets[idx + 1], packets[idx]
+            swapped += 1
+            idx += 2
+        else:
+            idx += 1
+
+    with UDPLoopbackServer(port=0) as server:
+        udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        udp_socket.connect((server.ip, server.port))
+        for _, _, data in packets:
+            udp_socket.send(data)
+            # let the single threaded server keep up, the kernel drops
+            # datagrams beyond its receive buffer
+            time.sleep(0)
+
+        deadline = time.perf_counter() + timeout
+        while server.datagrams < len(packets) \
+                and time.perf_counter() < deadline:
+            time.sleep(0.01)
+
+        addr = udp_socket.getsockname()
+        udp_socket.close()
+        received = [command for _, _, command in server.commands]
+        stats = server.decoders[addr].stats() if addr in server.decoders \
+            else Decoder().stats()
+
+    expected = [(name, params) for name, params, _ in packets]
+    decoded = [
+        (command.name, {
+            key: value for key, value in command._asdict().items()
+            if key in ('speed', 'heading', 'steps') and value is not None
+        })
+        for command in received
+    ]
+
+    if binary:
+        ok = (decoded == expected
+              and stats['missing'] == dropped
+              and stats['reordered'] == swapped
+              and sum(command.stale for command in received) == swapped
+              and stats['errors'] == 0)
+    else:
+        ok = decoded == expected
+
+    return {
+        'sent': len(packets),
+        'dropped': dropped,
+        'swapped': swapped,
+        'received': len(received),
+        'bytes': sum(len(data) for _, _, data in packets),
+        'stats': stats,
+        'ok': ok,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Local stand-in for the UDP listener of the hexapod')
+    parser.add_argument('--ip', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=1234)
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help='artificial reply delay in seconds')
+    parser.add_argument('--check', type=int, metavar='COUNT',
+                        help='run the protocol check with COUNT commands '
+                        'on a free port and exit')
+    parser.add_argument('--drop', type=float, default=0.0,
+                        help='fraction of dropped datagrams in the check')
+    parser.add_argument('--reorder', type=float, default=0.0,
+                        help='fraction of reordered datagrams in the check')
+    parser.add_argument('--text', action='store_true',
+                        help='check the text protocol instead of the '
+                        'binary framing')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    if args.check is not None:
+        result = run_protocol_check(
+            args.check, args.drop, args.reorder, not args.text, args.seed)
+        for key, value in result.items():
+            print(key + ': ' + str(value))
+        raise SystemExit(0 if result['ok'] else 1)
+
+    server = UDPLoopbackServer(args.ip, args.port, args.delay)
+    print('UDP Listening on IP: ' + server.ip + ':' + str(server.port))
+    server.start()
+    printed = 0
+    try:
+        while True:
+            time.sleep(0.1)
+            for _, addr, command in server.commands[printed:]:
+                print(addr[0] + ':' + str(addr[1]) + ' ' + str(command))
+            printed = len(server.commands)
+    except KeyboardInterrupt:
+        server.stop()
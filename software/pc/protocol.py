@@ -0,0 +1,371 @@
+"""
+    Copyright (C) 2017 - PRESENT  Zhengyu Peng, https://zpeng.me
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    ----------
+
+    `                      `
+    -:.                  -#:
+    -//:.              -###:
+    -////:.          -#####:
+    -/:.://:.      -###++##:
+    ..   `://:-  -###+. :##:
+           `:/+####+.   :##:
+    .::::::::/+###.     :##:
+    .////-----+##:    `:###:
+     `-//:.   :##:  `:###/.
+       `-//:. :##:`:###/.
+         `-//:+######/.
+           `-/+####/.
+             `+##+.
+              :##:
+              :##:
+              :##:
+              :##:
+              :##:
+               .+:
+
+"""
+
+from collections import namedtuple
+import struct
+
+# Binary command frame, little endian
+#
+#   sync     uint8   0xA5, never a byte of the ASCII text protocol
+#   opcode   uint8   see `OPCODES`
+#   seq      uint16  sequence number, wraps around
+#   mask     uint8   bit 0 speed, bit 1 heading, bit 2 steps
+#   speed    int16   mm/s, only with bit 0 of mask
+#   heading  int16   deg, only with bit 1 of mask
+#   steps    uint16  only with bit 2 of mask
+#   crc      uint8   CRC-8 (poly 0x07, init 0) of opcode to the last param
+#
+# so a bare mode change is 6 bytes, against 6 to 14 bytes of text, and the
+# receiver does one table lookup instead of a chain of string compares.
+SYNC = 0xA5
+
+HEADER = struct.Struct('<BBHB')
+PARAMS = (
+    ('speed', struct.Struct('<h')),
+    ('heading', struct.Struct('<h')),
+    ('steps', struct.Struct('<H')),
+)
+MAX_FRAME_SIZE = HEADER.size + sum(fmt.size for _, fmt in PARAMS) + 1
+
+SEQ_MODULO = 1 << 16
+
+# the commands of the text protocol, in the order of the `if`/`else` chain
+# of `hexapod_arduino.ino`, and the streamed setpoint
+OPCODES = {
+    'standby': 0x00,
+    'walk0': 0x01,
+    'walk180': 0x02,
+    'walkr45': 0x03,
+    'walkr90': 0x04,
+    'walkr135': 0x05,
+    'walkl45': 0x06,
+    'walkl90': 0x07,
+    'walkl135': 0x08,
+    'fastforward': 0x09,
+    'fastbackward': 0x0A,
+    'turnleft': 0x0B,
+    'turnright': 0x0C,
+    'climbforward': 0x0D,
+    'climbbackward': 0x0E,
+    'rotatex': 0x0F,
+    'rotatey': 0x10,
+    'rotatez': 0x11,
+    'twist': 0x12,
+    'laydown': 0x13,
+    'setpoint': 0x20,
+}
+COMMANDS = {opcode: name for name, opcode in OPCODES.items()}
+TEXT_CHARS = frozenset(''.join(OPCODES))
+
+# the walking directions of the text protocol, every 45 deg clockwise from
+# straight ahead
+DIRECTION_COMMANDS = (
+    'walk0', 'walkr45', 'walkr90', 'walkr135',
+    'walk180', 'walkl135', 'walkl90', 'walkl45',
+)
+
+Command = namedtuple(
+    'Command',
+    ['opcode', 'name', 'seq', 'speed', 'heading', 'steps', 'stale'])
+
+
+def _crc8_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data):
+    crc = 0
+    for byte in data:
+        crc = CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def command_name(cmd):
+    """Returns the name of a text command, 'walk0:' -> 'walk0'."""
+    return cmd.strip().rstrip(':')
+
+
+def encode(cmd, seq, speed=None, heading=None, steps=None):
+    """Encodes one binary command frame.
+
+    `cmd` is an opcode, a command name or a text command such as 'walk0:'.
+    """
+    if isinstance(cmd, str):
+        name = command_name(cmd)
+        if name not in OPCODES:
+            raise ProtocolError('unknown command: ' + cmd)
+        opcode = OPCODES[name]
+    else:
+        opcode = int(cmd)
+        if opcode not in COMMANDS:
+            raise ProtocolError('unknown opcode: ' + str(cmd))
+
+    values = {'speed': speed, 'heading': heading, 'steps': steps}
+    mask = 0
+    body = b''
+    for bit, (name, fmt) in enumerate(PARAMS):
+        if values[name] is not None:
+            mask |= 1 << bit
+            try:
+                body += fmt.pack(int(round(values[name])))
+            except struct.error:
+                raise ProtocolError(name + ' out of range: ' + str(values[name]))
+
+    frame = HEADER.pack(SYNC, opcode, seq % SEQ_MODULO, mask) + body
+    return frame + bytes([crc8(frame[1:])])
+
+
+def frame_size(mask):
+    return HEADER.size + sum(
+        fmt.size for bit, (_, fmt) in enumerate(PARAMS) if mask & (1 << bit)
+    ) + 1
+
+
+def decode(frame):
+    """Decodes one complete binary command frame.
+
+    The returned command has `stale` set to False, sequence tracking is done
+    by `Decoder`.
+    """
+    if len(frame) < HEADER.size + 1 or frame[0] != SYNC:
+        raise ProtocolError('not a command frame')
+
+    _, opcode, seq, mask = HEADER.unpack_from(frame)
+    if mask >> len(PARAMS):
+        raise ProtocolError('invalid parameter mask: ' + hex(mask))
+    if len(frame) != frame_size(mask):
+        raise ProtocolError('invalid frame size: ' + str(len(frame)))
+    if crc8(frame[1:-1]) != frame[-1]:
+        raise ProtocolError('checksum mismatch')
+    if opcode not in COMMANDS:
+        raise ProtocolError('unknown opcode: ' + hex(opcode))
+
+    values = {'speed': None, 'heading': None, 'steps': None}
+    offset = HEADER.size
+    for bit, (name, fmt) in enumerate(PARAMS):
+        if mask & (1 << bit):
+            values[name] = fmt.unpack_from(frame, offset)[0]
+            offset += fmt.size
+
+    return Command(opcode, COMMANDS[opcode], seq, stale=False, **values)
+
+
+def nearest_command(speed, heading, min_speed=20):
+    """Maps a (speed, heading) setpoint to the nearest text command name.
+
+    The text protocol has no analog setpoint, so it gets the walking
+    direction closest to `heading` (deg, clockwise, 0 straight ahead), and
+    'standby' below `min_speed` (mm/s). A negative speed walks the opposite
+    way.
+    """
+    if abs(speed) < min_speed:
+        return 'standby'
+    if speed < 0:
+        heading += 180
+    return DIRECTION_COMMANDS[int(round(heading / 45)) % 8]
+
+
+class Encoder:
+    """Turns commands into frames, numbering them in sending order.
+
+    With `binary` False it produces the text protocol instead, 'walk0:',
+    for firmware without binary support. Use one encoder per robot, so
+    that every robot sees a gap-free sequence.
+    """
+
+    def __init__(self, binary=True, seq=0):
+        self.binary = binary
+        self.seq = seq % SEQ_MODULO
+
+    def encode(self, cmd, speed=None, heading=None, steps=None):
+        if not self.binary:
+            if isinstance(cmd, str):
+                name = command_name(cmd)
+            else:
+                name = COMMANDS[cmd]
+            return (name + ':').encode()
+
+        frame = encode(cmd, self.seq, speed, heading, steps)
+        self.seq = (self.seq + 1) % SEQ_MODULO
+        return frame
+
+    def encode_setpoint(self, speed, heading):
+        """Encodes a streamed setpoint, as the nearest text command when the
+        encoder is not binary.
+        """
+        if not self.binary:
+            return self.encode(nearest_command(speed, heading))
+        return self.encode('setpoint', speed=speed, heading=heading)
+
+
+class Decoder:
+    """Stream decoder for a mix of binary frames and text commands.
+
+    `feed` takes the received bytes in any chunking and returns the complete
+    commands. A byte other than `SYNC` starts text, which is collected up to
+    its ':' and looked up like the firmware does, a byte that appears in no
+    command name discards it. A corrupted binary frame is dropped by
+    resynchronising on the next `SYNC` byte.
+
+    The sequence numbers of the binary frames are tracked: frames skipped
+    by the sequence count as `missing`, until they turn up late
+    (`reordered`), and a frame older than the newest one is marked `stale`
+    so the receiver can ignore it. Missing frames are remembered over the
+    last `MAX_TRACKED` sequence numbers.
+    """
+
+    MAX_TRACKED = 1024
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.text = ''
+        self.last_seq = None
+        self.missing = dict()
+
+        self.frames = 0
+        self.text_commands = 0
+        self.errors = 0
+        self.reordered = 0
+        self.duplicates = 0
+
+    def feed(self, data):
+        self.buffer += data
+        commands = []
+
+        while self.buffer:
+            if self.buffer[0] != SYNC:
+                in_char = chr(self.buffer.pop(0))
+                if in_char == ':':
+                    if self.text in OPCODES:
+                        self.text_commands += 1
+                        commands.append(Command(
+                            OPCODES[self.text], self.text, None,
+                            None, None, None, False))
+                    self.text = ''
+                elif in_char in TEXT_CHARS:
+                    self.text += in_char
+                else:
+                    # '\n', or the rest of a corrupted frame
+                    self.text = ''
+                continue
+
+            # binary frames do not continue unterminated text
+            self.text = ''
+            if len(self.buffer) < HEADER.size:
+                break
+            mask = self.buffer[4]
+            size = frame_size(mask) if mask >> len(PARAMS) == 0 else 0
+            if size == 0:
+                self.errors += 1
+                del self.buffer[0]
+                continue
+            if len(self.buffer) < size:
+                break
+
+            try:
+                command = decode(bytes(self.buffer[:size]))
+            except ProtocolError:
+                self.errors += 1
+                del self.buffer[0]
+                continue
+
+            del self.buffer[:size]
+            self.frames += 1
+            commands.append(self.track(command))
+
+        return commands
+
+    def feed_packet(self, data):
+        """Decodes one datagram.
+
+        Datagrams carry whole commands, so unlike `feed` nothing is carried
+        over to the next one, as the firmware does with its text commands.
+        """
+        commands = self.feed(data)
+        if self.buffer:
+            self.errors += 1
+            self.buffer.clear()
+        self.text = ''
+        return commands
+
+    def track(self, command):
+        seq = command.seq
+        if self.last_seq is None:
+            self.last_seq = seq
+            return command
+
+        ahead = (seq - self.last_seq) % SEQ_MODULO
+        if 0 < ahead < SEQ_MODULO // 2:
+            for skipped in range(1, ahead):
+                self.missing[(self.last_seq + skipped) % SEQ_MODULO] = True
+            while len(self.missing) > self.MAX_TRACKED:
+                del self.missing[next(iter(self.missing))]
+            self.last_seq = seq
+            return command
+
+        if self.missing.pop(seq, False):
+            self.reordered += 1
+        else:
+            self.duplicates += 1
+        return command._replace(stale=True)
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'text': self.text_commands,
+            'errors': self.errors,
+            'missing': len(self.missing),
+            'reordered': self.reordered,
+            'duplicates': self.duplicates,
+        }
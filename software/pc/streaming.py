@@ -0,0 +1,165 @@
+"""
+    Copyright (C) 2017 - PRESENT  Zhengyu Peng, https://zpeng.me
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    ----------
+
+    `                      `
+    -:.                  -#:
+    -//:.              -###:
+    -////:.          -#####:
+    -/:.://:.      -###++##:
+    ..   `://:-  -###+. :##:
+           `:/+####+.   :##:
+    .::::::::/+###.     :##:
+    .////-----+##:    `:###:
+     `-//:.   :##:  `:###/.
+       `-//:. :##:`:###/.
+         `-//:+######/.
+           `-/+####/.
+             `+##+.
+              :##:
+              :##:
+              :##:
+              :##:
+              :##:
+               .+:
+
+"""
+
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
+import math
+import time
+
+
+class SyntheticSource:
+    """Test input, a heading sweeping the full circle every `period` seconds
+    and a speed oscillating between 0 and `speed` mm/s.
+    """
+
+    def __init__(self, period=8.0, speed=150):
+        self.period = period
+        self.speed = speed
+        self.t0 = time.perf_counter()
+
+    def __call__(self):
+        phase = (time.perf_counter() - self.t0) / self.period
+        heading = (phase % 1) * 360 - 180
+        speed = self.speed * (0.5 - 0.5 * math.cos(2 * math.pi * phase * 2))
+        return speed, heading
+
+
+class SetpointStreamer(QObject):
+    """Streams the latest (speed, heading) setpoint at a fixed rate.
+
+    Setpoints come from polling `source`, a callable returning
+    (speed, heading), on every tick, or from `push` by event driven inputs.
+    Either way only the latest value is kept: values replaced before a tick
+    are coalesced and never sent, so nothing queues up behind a slow link.
+
+    On every tick of the `rate` Hz timer the latest setpoint is passed to
+    `send(speed, heading)` if it moved by more than `deadband`
+    (speed mm/s, heading deg) since the last one sent, or if `keepalive`
+    seconds have passed. When `backlog()` reports more than `max_backlog`
+    unsent bytes on the transports the tick is skipped, and the setpoint is
+    sent on the first tick after the link drains, if it is still the latest.
+    """
+    setpoint_sent = Signal(float, float)
+
+    def __init__(self, send, source=None, backlog=None, rate=50,
+                 deadband=(1.0, 1.0), keepalive=0.2, max_backlog=0,
+                 parent=None):
+        QObject.__init__(self, parent)
+
+        self.send = send
+        self.source = source
+        self.backlog = backlog
+        self.rate = rate
+        self.deadband = deadband
+        self.keepalive = keepalive
+        self.max_backlog = max_backlog
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.on_tick)
+
+        self.latest = None
+        self.is_new = False
+        self.last_sent = None
+        self.last_time = 0.0
+
+        self.ticks = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.deferred = 0
+        self.unchanged = 0
+
+    def start(self):
+        self.timer.start(max(1, int(round(1000 / self.rate))))
+
+    def stop(self):
+        """Stops streaming and sends a final zero speed setpoint."""
+        self.timer.stop()
+        heading = self.latest[1] if self.latest is not None else 0.0
+        self.latest = None
+        self.is_new = False
+        self.send(0.0, heading)
+
+    def is_active(self):
+        return self.timer.isActive()
+
+    def push(self, speed, heading):
+        if self.is_new:
+            self.coalesced += 1
+        self.latest = (float(speed), float(heading))
+        self.is_new = True
+
+    def on_tick(self):
+        self.ticks += 1
+        if self.source is not None:
+            self.push(*self.source())
+        if self.latest is None:
+            return
+
+        if self.backlog is not None and self.backlog() > self.max_backlog:
+            self.deferred += 1
+            return
+
+        now = time.perf_counter()
+        if self.last_sent is not None and now - self.last_time < self.keepalive:
+            speed_change = abs(self.latest[0] - self.last_sent[0])
+            heading_change = abs(
+                (self.latest[1] - self.last_sent[1] + 180) % 360 - 180)
+            if speed_change <= self.deadband[0] \
+                    and heading_change <= self.deadband[1]:
+                self.unchanged += 1
+                self.is_new = False
+                return
+
+        self.send(*self.latest)
+        self.setpoint_sent.emit(*self.latest)
+        self.last_sent = self.latest
+        self.last_time = now
+        self.is_new = False
+        self.sent += 1
+
+    def stats(self):
+        return {
+            'ticks': self.ticks,
+            'sent': self.sent,
+            'coalesced': self.coalesced,
+            'deferred': self.deferred,
+            'unchanged': self.unchanged,
+        }
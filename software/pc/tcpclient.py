@@ -39,8 +39,8 @@
 
 """
 
-from PySide6.QtCore import QObject, Signal, Slot
-import socket
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from PySide6.QtNetwork import QAbstractSocket, QTcpSocket
 
 
 class TCPClient(QObject):
@@ -55,50 +55,76 @@ class TCPClient(QObject):
     SIG_STOP = 1
     SIG_DISCONNECT = 2
 
-    def __init__(self, ip, port):
-        QObject.__init__(self)
+    # give up connecting after this many milliseconds
+    CONNECT_TIMEOUT = 1000
+
+    def __init__(self, ip, port, parent=None):
+        QObject.__init__(self, parent)
 
         self.ip = ip
         self.port = port
-        self.tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.tcp_socket.settimeout(1)
+        self.tcp_socket = QTcpSocket(self)
+        self.tcp_socket.connected.connect(self.on_connected)
+        self.tcp_socket.readyRead.connect(self.on_ready_read)
+        self.tcp_socket.disconnected.connect(self.on_disconnected)
+        self.tcp_socket.errorOccurred.connect(self.on_error)
+
+        self.connect_timer = QTimer(self)
+        self.connect_timer.setSingleShot(True)
+        self.connect_timer.timeout.connect(self.on_connect_timeout)
 
         self.signal = self.SIG_NORMAL
 
     @Slot()
     def start(self):
-        try:
-            self.tcp_socket.connect((self.ip, self.port))
-        except OSError as err:
-            print(err)
-            # self.status.emit(self.STOP, '')
-        else:
-            # print('connected')
-            self.status.emit(self.CONNECTED, self.ip)
-
-            while True:
-                if self.signal == self.SIG_NORMAL:
-                    try:
-
-                        data = self.tcp_socket.recv(4096)
-                    except socket.timeout as t_out:
-                        pass
-                    else:
-                        if data:
-                            self.message.emit(
-                                self.ip+':'+str(self.port),
-                                data.decode())
-                        else:
-                            break
-                elif self.signal == self.SIG_DISCONNECT:
-                    self.signal = self.SIG_NORMAL
-                    self.tcp_socket.close()
-                    break
-        finally:
-            self.status.emit(self.STOP, '')
+        self.signal = self.SIG_NORMAL
+        self.connect_timer.start(self.CONNECT_TIMEOUT)
+        self.tcp_socket.connectToHost(self.ip, self.port)
 
     def send(self, msg):
-        self.tcp_socket.sendall(msg.encode())
+        # text commands, or frames of `protocol.Encoder`
+        if isinstance(msg, str):
+            msg = msg.encode()
+        self.tcp_socket.write(msg)
+
+    def backlog(self):
+        # bytes written but not yet handed to the OS
+        return self.tcp_socket.bytesToWrite()
 
     def close(self):
         self.signal = self.SIG_DISCONNECT
+        self.tcp_socket.abort()
+        self.stop()
+
+    def stop(self):
+        # the socket may report the same shutdown more than once (error and
+        # disconnected), STOP is only emitted for the first one
+        self.connect_timer.stop()
+        if self.signal != self.SIG_STOP:
+            self.signal = self.SIG_STOP
+            self.status.emit(self.STOP, '')
+
+    def on_connected(self):
+        self.connect_timer.stop()
+        self.tcp_socket.setSocketOption(QAbstractSocket.LowDelayOption, 1)
+        self.status.emit(self.CONNECTED, self.ip)
+
+    def on_ready_read(self):
+        data = self.tcp_socket.readAll().data()
+        if data:
+            self.message.emit(
+                self.ip+':'+str(self.port),
+                data.decode())
+
+    def on_disconnected(self):
+        self.stop()
+
+    def on_error(self, error):
+        print(self.tcp_socket.errorString())
+        self.tcp_socket.abort()
+        self.stop()
+
+    def on_connect_timeout(self):
+        print('timed out')
+        self.tcp_socket.abort()
+        self.stop()
@@ -0,0 +1,177 @@
+"""
+    Copyright (C) 2017 - PRESENT  Zhengyu Peng, https://zpeng.me
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    ----------
+
+    `                      `
+    -:.                  -#:
+    -//:.              -###:
+    -////:.          -#####:
+    -/:.://:.      -###++##:
+    ..   `://:-  -###+. :##:
+           `:/+####+.   :##:
+    .::::::::/+###.     :##:
+    .////-----+##:    `:###:
+     `-//:.   :##:  `:###/.
+       `-//:. :##:`:###/.
+         `-//:+######/.
+           `-/+####/.
+             `+##+.
+              :##:
+              :##:
+              :##:
+              :##:
+              :##:
+               .+:
+
+"""
+
+from PySide6.QtCore import QObject, Signal, Slot
+from PySide6.QtNetwork import QAbstractSocket, QUdpSocket
+from collections import deque
+import time
+
+
+class UDPClient(QObject):
+    """Datagram transport for the `AsyncUDP` listener of the firmware.
+
+    There is no connection setup, `start` only binds the socket to the
+    robot address, and every `send` goes out as a single datagram. The
+    firmware answers every datagram with "Got N bytes of data", and the
+    replies are matched to the pending datagrams in order to measure the
+    round-trip latency.
+    """
+    status = Signal(int, object)
+    message = Signal(object, object)
+    latency = Signal(float)
+    ERROR = -1
+    LISTEN = 1
+    CONNECTED = 2
+    STOP = 3
+
+    SIG_NORMAL = 0
+    SIG_STOP = 1
+    SIG_DISCONNECT = 2
+
+    # a datagram without a reply after this many seconds counts as lost
+    REPLY_TIMEOUT = 1.0
+    # number of the latest round trips kept for the statistics
+    RTT_WINDOW = 100
+
+    def __init__(self, ip, port, parent=None):
+        QObject.__init__(self, parent)
+
+        self.ip = ip
+        self.port = port
+        self.udp_socket = QUdpSocket(self)
+        self.udp_socket.connected.connect(self.on_connected)
+        self.udp_socket.readyRead.connect(self.on_ready_read)
+        self.udp_socket.errorOccurred.connect(self.on_error)
+
+        self.signal = self.SIG_NORMAL
+
+        self.pending = deque()
+        self.rtt = deque(maxlen=self.RTT_WINDOW)
+        self.sent = 0
+        self.received = 0
+        self.lost = 0
+
+    @Slot()
+    def start(self):
+        self.signal = self.SIG_NORMAL
+        self.udp_socket.connectToHost(self.ip, self.port)
+
+    def send(self, msg):
+        # text commands, or frames of `protocol.Encoder`
+        if isinstance(msg, str):
+            msg = msg.encode()
+        now = time.perf_counter()
+        # a peer that never answers must not grow the queue without bound
+        self.expire_pending(now)
+        self.pending.append(now)
+        self.sent += 1
+        self.udp_socket.write(msg)
+
+    def backlog(self):
+        # datagrams are sent right away or dropped, nothing queues up
+        return 0
+
+    def close(self):
+        self.signal = self.SIG_DISCONNECT
+        self.udp_socket.abort()
+        self.stop()
+
+    def stop(self):
+        if self.signal != self.SIG_STOP:
+            self.signal = self.SIG_STOP
+            self.status.emit(self.STOP, '')
+
+    def on_connected(self):
+        self.status.emit(self.CONNECTED, self.ip)
+
+    def on_ready_read(self):
+        while self.udp_socket.hasPendingDatagrams():
+            data = self.udp_socket.receiveDatagram().data().data()
+            self.on_reply(time.perf_counter())
+            self.message.emit(
+                self.ip+':'+str(self.port)+' (UDP)',
+                data.decode())
+
+    def on_error(self, error):
+        if error == QAbstractSocket.ConnectionRefusedError:
+            # ICMP port unreachable, the robot is not listening (yet), keep
+            # the transport open
+            return
+        print(self.udp_socket.errorString())
+        self.udp_socket.abort()
+        self.stop()
+
+    def expire_pending(self, now):
+        while self.pending and now - self.pending[0] > self.REPLY_TIMEOUT:
+            self.pending.popleft()
+            self.lost += 1
+
+    def on_reply(self, now):
+        self.expire_pending(now)
+        if not self.pending:
+            return
+        rtt = (now - self.pending.popleft()) * 1000
+        self.rtt.append(rtt)
+        self.received += 1
+        self.latency.emit(rtt)
+
+    def latency_stats(self):
+        """Returns the round-trip statistics of the transport.
+
+        The min/mean/max/last values are in milliseconds, over the latest
+        `RTT_WINDOW` replies, and None before the first reply.
+        """
+        self.expire_pending(time.perf_counter())
+        stats = {
+            'sent': self.sent,
+            'received': self.received,
+            'lost': self.lost,
+            'pending': len(self.pending),
+        }
+
+        if self.rtt:
+            stats['min'] = min(self.rtt)
+            stats['mean'] = sum(self.rtt) / len(self.rtt)
+            stats['max'] = max(self.rtt)
+            stats['last'] = self.rtt[-1]
+        else:
+            stats['min'] = stats['mean'] = stats['max'] = stats['last'] = None
+        return stats